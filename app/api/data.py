@@ -1,25 +1,429 @@
+import asyncio
+import errno
+import fnmatch
+import hashlib
 import logging
+import mimetypes
+import multiprocessing
 import os
+import re
 import shutil
+import threading
 import time
 import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Callable, Optional, Set, Iterator
 
-from flask import Flask, request, jsonify, send_file
-from werkzeug.datastructures import FileStorage
+import orjson
+from flask import Flask, request, jsonify, send_from_directory
+from llama_index.core.schema import BaseNode
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.targets import BaseTarget, ValueTarget
+from werkzeug.exceptions import NotFound
 from werkzeug.utils import secure_filename
 
-from app.config.config import STORING_CONFIG
+from app.config.config import DOC_PROCESSING_CONFIG, STORING_CONFIG
 from app.data_indexing.file.document_loader.local_file import LocalFileLoader
 from app.data_indexing.file.document_splitter.document_splitter_factory import DocumentSplitterFactory
 from app.data_source.vector.factory import VectorStoreFactory
+from app.utils.ttl_cache import TTLCache
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 上传请求体的流式读取块大小，同时作为文件写入缓冲区大小
+UPLOAD_STREAM_CHUNK_SIZE = 1024 * 1024
+
+# 向量库批量写入的最大并发批次数
+INSERT_MAX_CONCURRENCY = 4
+
+# 创建硬链接失败时需要回退到复制的错误码
+_LINK_FALLBACK_ERRNOS = frozenset({errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP})
+
+# 目录导入时每累积该数量的文件即处理并写入向量库
+IMPORT_FLUSH_FILES = 32
+
+# 超过该数量的物理文件删除使用线程池并发执行
+PARALLEL_REMOVE_THRESHOLD = 32
+
+# 文件名中需要替换的非法字符
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^A-Za-z0-9._-]+')
+
+# 上传接口支持的表单字段
+UPLOAD_FORM_FIELDS = ('filename', 'split_strategy', 'chunk_size', 'chunk_overlap', 'batch_size', 'metadata')
+
+
+# 文件大小单位表，按 (size.bit_length() - 1) // 10 索引：(位移, 单位)
+_SIZE_UNITS = ((0, "B"), (10, "KB"), (20, "MB"), (30, "GB"))
+
+
+def _format_file_size(size: int) -> str:
+    """
+    格式化文件大小
+    
+    Args:
+        size: 文件大小（字节）
+        
+    Returns:
+        带单位的文件大小字符串，如 "1.20MB"
+    """
+    shift, unit = _SIZE_UNITS[min(max(size.bit_length() - 1, 0) // 10, 3)]
+    if not shift:
+        return f"{size}{unit}"
+    return f"{size / (1 << shift):.2f}{unit}"
+
+
+def _generate_file_ids(count: int) -> List[str]:
+    """
+    批量生成文件ID，只读取一次系统随机数
+    
+    Args:
+        count: 文件ID数量
+        
+    Returns:
+        32位十六进制文件ID列表
+    """
+    raw = os.urandom(16 * count)
+    return [raw[i:i + 16].hex() for i in range(0, 16 * count, 16)]
+
+
+@lru_cache(maxsize=1024)
+def _file_extension(filename: str) -> str:
+    """
+    获取小写的文件扩展名
+    
+    Args:
+        filename: 文件名
+        
+    Returns:
+        不含点号的小写扩展名，没有扩展名时返回空字符串
+    """
+    _, dot, ext = filename.rpartition('.')
+    return ext.lower() if dot else ''
+
+
+@lru_cache(maxsize=256)
+def _guess_mime_type(ext: str) -> str:
+    """
+    根据扩展名推断MIME类型，结果按扩展名缓存
+    
+    Args:
+        ext: 不含点号的小写扩展名
+        
+    Returns:
+        MIME类型字符串，无法识别时返回application/octet-stream
+    """
+    return mimetypes.guess_type(f"x.{ext}")[0] or 'application/octet-stream'
+
+
+def _safe_filename(filename: str) -> str:
+    """
+    生成安全的文件名，ASCII文件名直接用预编译正则替换非法字符，
+    其余情况回退到secure_filename做unicode规范化
+    
+    Args:
+        filename: 用户提供的文件名
+        
+    Returns:
+        安全的文件名，可能为空字符串
+    """
+    if filename.isascii():
+        safe = _UNSAFE_FILENAME_CHARS.sub('_', filename).strip('._')[:200]
+        if safe:
+            return safe
+    return secure_filename(filename)
+
+
+def _metadata_digest(metadata: Optional[Dict[str, Any]]) -> str:
+    """
+    用户元数据的摘要，键排序后序列化，用于判断重复上传时元数据是否一致
+    
+    Args:
+        metadata: 用户提供的元数据
+        
+    Returns:
+        32位十六进制摘要
+    """
+    payload = orjson.dumps(metadata or {}, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _reserve_unique_path(path: Path) -> Path:
+    """
+    在目标目录中占用一个不存在的文件名，同名文件已存在时追加序号，不覆盖已有文件
+    
+    Args:
+        path: 期望的文件路径
+        
+    Returns:
+        已创建（空文件）的唯一路径，调用方可直接用os.replace覆盖
+    """
+    candidate = path
+    index = 1
+    while True:
+        try:
+            os.close(os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return candidate
+        except FileExistsError:
+            candidate = path.with_name(f"{path.stem}_{index}{path.suffix}")
+            index += 1
+
+
+def _iter_files(root: str, recursive: bool = True, skip_symlinks: bool = True) -> Iterator[os.DirEntry]:
+    """
+    使用os.scandir遍历目录下的文件，不进入符号链接目录，跳过无权限访问的目录
+    
+    Args:
+        root: 根目录
+        recursive: 是否递归子目录
+        skip_symlinks: 是否跳过指向文件的符号链接，为False时与rglob一致返回链接文件
+        
+    Returns:
+        文件DirEntry迭代器，可直接复用其缓存的stat结果
+    """
+    pending_dirs = [root]
+    while pending_dirs:
+        try:
+            with os.scandir(pending_dirs.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending_dirs.append(entry.path)
+                    elif entry.is_symlink():
+                        if not skip_symlinks and entry.is_file():
+                            yield entry
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except PermissionError as e:
+            logger.warning(f"无权限访问目录: {e.filename}")
+
+
+class _StatsCache:
+    """
+    数据统计缓存，入库时增量更新，删除后失效，超过TTL后重新全量统计
+    缓存只在当前进程内，其他worker的入库和删除只能等TTL过期后体现，因此TTL保持在数秒内
+    """
+
+    def __init__(self, ttl: float = 5.0):
+        """
+        初始化缓存
+        
+        Args:
+            ttl: 全量统计结果的有效期（秒）
+        """
+        self.ttl = ttl
+        self._stats: Dict[str, Any] | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Dict[str, Any] | None:
+        with self._lock:
+            if self._stats is None or self._expires_at < time.monotonic():
+                return None
+            return {**self._stats, "file_types": dict(self._stats["file_types"])}
+
+    def set(self, total_nodes: int, total_files: int, file_types: Dict[str, int], storage_bytes: Optional[int]):
+        with self._lock:
+            self._stats = {
+                "total_nodes": total_nodes,
+                "total_files": total_files,
+                "file_types": Counter(file_types),
+                "storage_bytes": storage_bytes
+            }
+            self._expires_at = time.monotonic() + self.ttl
+
+    def add_file(self, file_name: str, node_count: int, file_size: Optional[int]):
+        with self._lock:
+            if self._stats is None:
+                return
+            
+            self._stats["total_nodes"] += node_count
+            self._stats["total_files"] += 1
+            ext = _file_extension(file_name)
+            if ext:
+                self._stats["file_types"][ext] += 1
+            if self._stats["storage_bytes"] is not None and file_size is not None:
+                self._stats["storage_bytes"] += file_size
+
+    def invalidate(self):
+        with self._lock:
+            self._stats = None
+
+
+class _UploadFileTarget(BaseTarget):
+    """
+    流式上传文件目标，将每个文件分片直接写入上传目录，不经过临时文件
+    """
+
+    def __init__(self, upload_dir: Path, allowed_file: Callable[[str], bool]):
+        """
+        初始化文件写入目标
+        
+        Args:
+            upload_dir: 上传目录
+            allowed_file: 文件类型检查函数
+        """
+        super().__init__()
+        self.upload_dir = upload_dir
+        self.allowed_file = allowed_file
+        self.saved_files: List[Tuple[str, str, str, Optional[str]]] = []  # (文件路径, 文件ID, 原始文件名, 内容SHA-256)
+        self.rejected_files: List[str] = []  # 文件名为空或类型不支持的文件
+        self._fd = None
+        self._current = None
+        self._hasher = None
+
+    def on_start(self):
+        filename = self.multipart_filename or ''
+        if not filename or not self.allowed_file(filename):
+            self.rejected_files.append(filename)
+            return
+        
+        # 生成唯一文件ID，直接写入最终路径
+        file_id = uuid.uuid4().hex
+        file_path = self.upload_dir / f"{file_id}{Path(filename).suffix}"
+        self._fd = open(file_path, 'wb', buffering=UPLOAD_STREAM_CHUNK_SIZE)
+        self._current = (str(file_path), file_id, filename)
+        # 写盘的同时计算内容哈希，避免为去重再读一遍文件
+        self._hasher = hashlib.sha256()
+
+    def on_data_received(self, chunk: bytes):
+        if self._fd is not None:
+            self._fd.write(chunk)
+            self._hasher.update(chunk)
+
+    def on_finish(self):
+        if self._fd is not None:
+            self._fd.close()
+            self._fd = None
+            self.saved_files.append((*self._current, self._hasher.hexdigest()))
+            logger.info(f"文件保存成功: {self._current[0]}")
+        self._current = None
+
+    def discard(self):
+        """删除已写入的全部文件（包括未写完的文件）"""
+        if self._fd is not None:
+            self._fd.close()
+            self._fd = None
+            self.saved_files.append((*self._current, None))
+        for file_path, *_ in self.saved_files:
+            Path(file_path).unlink(missing_ok=True)
+        self.saved_files = []
+
+
+def _prepare_document_nodes(
+    file_loader: LocalFileLoader,
+    file_path: str,
+    file_id: str,
+    original_filename: str,
+    split_strategy: str = "sentence",
+    chunk_size: int = 500,
+    chunk_overlap: int = 50,
+    metadata: Dict[str, Any] = None,
+    upload_time: Optional[str] = None,
+    content_hash: Optional[str] = None
+) -> Tuple[Dict[str, Any], List[BaseNode]]:
+    """
+    加载、解析、拆分文档并添加元数据，不写入向量库
+    
+    Args:
+        file_loader: 文档加载器
+        file_path: 文件路径
+        file_id: 文件ID
+        original_filename: 原始文件名
+        split_strategy: 拆分策略
+        chunk_size: 块大小
+        chunk_overlap: 块重叠
+        metadata: 额外元数据
+        upload_time: 上传时间，批量处理时由调用方统一生成，默认取当前时间
+        content_hash: 文件内容的SHA-256，用于识别重复上传
+        
+    Returns:
+        (处理结果信息, 节点列表)
+    """
+    start_time = time.time()
+    
+    # 1. 加载文档
+    logger.info(f"开始加载文档: {file_path}")
+    documents = file_loader.load_documents(file_path)
+    logger.info(f"文档加载完成，共 {len(documents)} 个文档")
+    
+    # 2. 创建文档拆分器
+    splitter = DocumentSplitterFactory.create(
+        split_strategy=split_strategy,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+    
+    # 3. 拆分文档
+    logger.info("开始拆分文档")
+    nodes = splitter.get_nodes_from_documents(documents, show_progress=True)
+    logger.info(f"文档拆分完成，共 {len(nodes)} 个节点")
+    
+    # 4. 添加元数据
+    base_metadata = {
+        "file_id": file_id,
+        "file_name": original_filename,
+        "file_path": file_path,
+        "upload_time": upload_time or datetime.now().isoformat(),
+        "split_strategy": split_strategy,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap
+    }
+    
+    if content_hash:
+        base_metadata["content_hash"] = content_hash
+    
+    if metadata:
+        base_metadata.update(metadata)
+    
+    # 为每个节点添加元数据，基础元数据覆盖节点原有的同名字段；
+    # 原有元数据相同的相邻节点（通常来自同一文档）共享同一个合并结果，
+    # 入库前会由向量存储各自序列化，共享引用不会被改写
+    last_source, merged = None, base_metadata
+    for node in nodes:
+        if node.metadata != last_source:
+            last_source = node.metadata
+            merged = {**last_source, **base_metadata} if last_source else base_metadata
+        node.metadata = merged
+    
+    processing_time = time.time() - start_time
+    
+    result = {
+        "file_id": file_id,
+        "file_name": original_filename,
+        "file_path": file_path,
+        "document_count": len(documents),
+        "node_count": len(nodes),
+        "processing_time": processing_time,
+        "metadata": base_metadata
+    }
+    return result, nodes
+
+
+# 子进程内复用的文档加载器
+_worker_file_loader: LocalFileLoader | None = None
+
+
+def _prepare_worker(args: tuple) -> Tuple[Dict[str, Any], List[BaseNode]]:
+    """
+    进程池任务：在子进程中完成文档的加载和拆分
+    
+    Args:
+        args: _prepare_document_nodes 除file_loader外的参数元组
+        
+    Returns:
+        (处理结果信息, 节点列表)
+    """
+    global _worker_file_loader
+    if _worker_file_loader is None:
+        _worker_file_loader = LocalFileLoader()
+    return _prepare_document_nodes(_worker_file_loader, *args)
+
 
 class DataAPI:
     """
@@ -36,15 +440,21 @@ class DataAPI:
         self.app: Flask = app
         self.file_loader = None
         self.vector_store = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._file_info_cache = TTLCache(maxsize=4096, ttl=30.0)  # 文件信息缓存
+        self._stats_cache = _StatsCache()
+        self._data_change_listeners: List[Callable[[], None]] = []  # 数据入库或删除后的回调
         
         # 文档存储配置
         self.upload_dir = Path(STORING_CONFIG.get("upload_dir", "~/storage/uploads"))
         
         # 支持的文件类型
-        self.allowed_extensions = {
+        self.allowed_extensions = frozenset({
             'txt', 'pdf', 'doc', 'docx', 'html', 'htm', 
             'md', 'markdown', 'csv', 'xls', 'xlsx'
-        }
+        })
+        self.allowed_suffixes = tuple(f".{ext}" for ext in self.allowed_extensions)
         
         # 文件类型与MIME类型的映射
         self.mime_types = {
@@ -90,6 +500,23 @@ class DataAPI:
         # 注册路由
         self._register_routes()
 
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """
+        获取文档解析、拆分的进程池，首次批量处理时创建
+        子进程以spawn方式启动，不继承父进程中其他线程持有的锁和已初始化的CUDA上下文
+        
+        Returns:
+            进程池实例
+        """
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=max(1, DOC_PROCESSING_CONFIG["workers"]),
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._pool
+
     def _ensure_storage_directories(self):
         """确保存储目录存在"""
         self.upload_dir.mkdir(parents=True, exist_ok=True)
@@ -105,8 +532,7 @@ class DataAPI:
         Returns:
             是否允许的文件类型
         """
-        return '.' in filename and \
-               filename.rsplit('.', 1)[1].lower() in self.allowed_extensions
+        return _file_extension(filename) in self.allowed_extensions
 
     def _get_file_info_by_id(self, file_id: str) -> Dict[str, Any] | None:
         """
@@ -118,60 +544,208 @@ class DataAPI:
         Returns:
             文件信息字典，如果未找到返回None
         """
+        file_info = self._file_info_cache.get(file_id)
+        if file_info is None:
+            file_info = self._get_file_infos_by_ids([file_id]).get(file_id)
+        return file_info
+
+    def _get_file_infos_by_ids(self, file_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        根据多个文件ID批量获取文件信息，只查询一次向量库
+        
+        Args:
+            file_ids: 文件ID列表
+            
+        Returns:
+            文件ID到文件信息字典的映射，未找到的文件不包含在结果中
+        """
+        if not file_ids:
+            return {}
+        
         try:
-            # 从向量库查询文件信息
-            nodes = self.vector_store.get_data(filters={"file_id": file_id})
+            # 从向量库一次性查询所有文件的节点
+            nodes = self.vector_store.get_data(filters={"file_id": list(file_ids)})
             
-            if not nodes:
-                return None
+            # 按文件分组，记录第一个节点的元数据和节点数量
+            grouped = {}
+            for node in nodes:
+                metadata = node.metadata
+                if not metadata or 'file_id' not in metadata:
+                    continue
+                entry = grouped.get(metadata['file_id'])
+                if entry is None:
+                    grouped[metadata['file_id']] = [metadata, 1]
+                else:
+                    entry[1] += 1
+            
+            # 向量库查询返回后再检查物理文件，多个文件时只扫描一次上传目录
+            snapshot = None
+            if len(grouped) > 1:
+                snapshot = self._snapshot_upload_dir(
+                    {Path(metadata.get('file_path') or '').name for metadata, _ in grouped.values()}
+                )
             
-            # 从第一个节点获取文件元数据
-            first_node = nodes[0]
-            if not first_node.metadata:
-                return None
+            file_infos = {}
+            for file_id, (metadata, node_count) in grouped.items():
+                file_stat = self._stat_file(metadata.get('file_path'), snapshot)
+                if file_stat is None:
+                    continue
+                file_infos[file_id] = self._build_file_info(file_id, metadata, node_count, file_stat)
+                self._file_info_cache.set(file_id, file_infos[file_id])
+            return file_infos
             
-            metadata = first_node.metadata
-            file_path = metadata.get('file_path')
+        except Exception as e:
+            logger.error(f"获取文件信息失败: {str(e)}")
+            return {}
+
+    def _iter_supported_files(self, root: Path, recursive: bool = True, file_pattern: str = '*') -> Iterator[Path]:
+        """
+        使用os.scandir单次遍历目录，逐个返回支持类型的文件
+        
+        Args:
+            root: 根目录
+            recursive: 是否递归子目录
+            file_pattern: 文件名匹配模式（不含路径）
             
-            # 检查物理文件是否存在
-            if not file_path or not os.path.exists(file_path):
-                return None
+        Returns:
+            支持类型的文件路径迭代器
+        """
+        name_regex = None if file_pattern == '*' else re.compile(fnmatch.translate(file_pattern))
+        
+        for entry in _iter_files(str(root), recursive=recursive, skip_symlinks=False):
+            if not entry.name.lower().endswith(self.allowed_suffixes):
+                continue
+            if name_regex is not None and not name_regex.match(entry.name):
+                continue
+            yield Path(entry.path)
+
+    @staticmethod
+    def _link_or_copy(src: Path, dest: Path):
+        """
+        将文件放入存储目录，默认复制文件；启用IMPORT_HARDLINK且位于同一文件系统时创建硬链接，避免复制文件内容
+        硬链接与源文件共享内容，源文件之后的修改会直接反映到存储目录中的文件
+        
+        Args:
+            src: 源文件路径
+            dest: 目标文件路径
+        """
+        if not STORING_CONFIG["import_hardlink"]:
+            shutil.copy2(str(src), str(dest))
+            return
+        try:
+            os.link(str(src), str(dest))
+        except OSError as e:
+            # 跨设备或文件系统不支持硬链接时回退到复制
+            if e.errno not in _LINK_FALLBACK_ERRNOS:
+                raise
+            shutil.copy2(str(src), str(dest))
+
+    @staticmethod
+    def _remove_files(file_paths: Set[str]) -> int:
+        """
+        删除物理文件，文件较多时使用线程池并发删除
+        
+        Args:
+            file_paths: 文件路径集合
             
-            # 获取文件信息
-            file_stat = os.stat(file_path)
-            file_size = file_stat.st_size
-            
-            # 格式化文件大小
-            if file_size > 1024 * 1024 * 1024:
-                file_size_str = f"{file_size / (1024 * 1024 * 1024):.2f}GB"
-            elif file_size > 1024 * 1024:
-                file_size_str = f"{file_size / (1024 * 1024):.2f}MB"
-            elif file_size > 1024:
-                file_size_str = f"{file_size / 1024:.2f}KB"
-            else:
-                file_size_str = f"{file_size}B"
-            
-            # 获取文件类型
-            file_name = metadata.get('file_name', '')
-            file_ext = file_name.split('.')[-1].lower() if '.' in file_name else 'unknown'
-            
-            return {
-                "file_id": file_id,
-                "file_name": metadata.get('file_name', 'unknown'),
-                "file_path": file_path,
-                "file_size": file_size_str,
-                "file_size_bytes": file_size,
-                "file_type": file_ext,
-                "upload_time": metadata.get('upload_time', ''),
-                "node_count": len(nodes),
-                "metadata": {k: v for k, v in metadata.items() 
-                           if k not in ['file_path']}  # 不暴露文件路径
-            }
+        Returns:
+            实际删除的文件数量
+        """
+        def _remove(file_path: str) -> bool:
+            try:
+                Path(file_path).unlink()
+            except FileNotFoundError:
+                return False
+            logger.info(f"已删除物理文件: {file_path}")
+            return True
+        
+        if len(file_paths) < PARALLEL_REMOVE_THRESHOLD:
+            return sum(map(_remove, file_paths))
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return sum(executor.map(_remove, file_paths))
+
+    def _snapshot_upload_dir(self, names: Optional[Set[str]] = None) -> Dict[str, os.stat_result]:
+        """
+        扫描一次上传目录，获取文件状态
+        
+        Args:
+            names: 只获取这些文件名的状态，为None时获取全部文件
             
-        except Exception as e:
-            logger.error(f"获取文件信息失败: {str(e)}")
+        Returns:
+            文件名到stat结果的映射
+        """
+        snapshot = {}
+        try:
+            with os.scandir(self.upload_dir) as entries:
+                for entry in entries:
+                    if names is not None and entry.name not in names:
+                        continue
+                    if entry.is_file():
+                        snapshot[entry.name] = entry.stat()
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def _stat_file(self, file_path: str | None,
+                   snapshot: Optional[Dict[str, os.stat_result]] = None) -> os.stat_result | None:
+        """
+        获取文件状态，上传目录中的文件优先使用目录快照
+        
+        Args:
+            file_path: 文件路径
+            snapshot: _snapshot_upload_dir 返回的目录快照
+            
+        Returns:
+            stat结果，文件不存在时返回None
+        """
+        if not file_path:
+            return None
+        
+        path = Path(file_path)
+        if snapshot is not None and path.parent == self.upload_dir:
+            return snapshot.get(path.name)
+        
+        try:
+            return os.stat(file_path)
+        except OSError:
             return None
 
+    @staticmethod
+    def _build_file_info(file_id: str, metadata: Dict[str, Any], node_count: int,
+                         file_stat: os.stat_result) -> Dict[str, Any]:
+        """
+        根据节点元数据构建文件信息
+        
+        Args:
+            file_id: 文件ID
+            metadata: 文件第一个节点的元数据
+            node_count: 文件的节点数量
+            file_stat: 物理文件的stat结果
+            
+        Returns:
+            文件信息字典
+        """
+        file_path = metadata.get('file_path')
+        file_size = file_stat.st_size
+        
+        # 获取文件类型
+        file_name = metadata.get('file_name', '')
+        file_ext = _file_extension(file_name) or 'unknown'
+        
+        return {
+            "file_id": file_id,
+            "file_name": metadata.get('file_name', 'unknown'),
+            "file_path": file_path,
+            "file_size": _format_file_size(file_size),
+            "file_size_bytes": file_size,
+            "file_type": file_ext,
+            "upload_time": metadata.get('upload_time', ''),
+            "node_count": node_count,
+            "metadata": {k: v for k, v in metadata.items() 
+                       if k not in ['file_path']}  # 不暴露文件路径
+        }
+
     def _get_mime_type(self, filename: str) -> str:
         """
         根据文件名获取MIME类型
@@ -182,46 +756,106 @@ class DataAPI:
         Returns:
             MIME类型字符串
         """
-        if '.' not in filename:
-            return 'application/octet-stream'
+        ext = _file_extension(filename)
+        # 常见类型直接查表，其余类型交给mimetypes推断
+        return self.mime_types.get(ext) or _guess_mime_type(ext)
+
+    def _parse_upload_stream(self, file_field: str) -> Tuple[_UploadFileTarget, Dict[str, str]]:
+        """
+        流式解析multipart请求体，文件直接写入上传目录
+        
+        Args:
+            file_field: 文件字段名
+            
+        Returns:
+            (文件写入目标, 表单字段字典)
+        """
+        parser = StreamingFormDataParser(headers={'Content-Type': request.content_type})
+        
+        file_target = _UploadFileTarget(self.upload_dir, self._allowed_file)
+        parser.register(file_field, file_target)
+        
+        value_targets = {name: ValueTarget() for name in UPLOAD_FORM_FIELDS}
+        for name, target in value_targets.items():
+            parser.register(name, target)
         
-        ext = filename.split('.')[-1].lower()
-        return self.mime_types.get(ext, 'application/octet-stream')
+        try:
+            while True:
+                chunk = request.stream.read(UPLOAD_STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                parser.data_received(chunk)
+        except Exception:
+            file_target.discard()
+            raise
+        
+        form = {name: target.value.decode('utf-8') for name, target in value_targets.items() if target.value}
+        return file_target, form
 
-    def _save_uploaded_file(self, file: FileStorage, custom_filename: str = None) -> tuple:
+    def _prepare_nodes(
+        self, 
+        file_path: str, 
+        file_id: str, 
+        original_filename: str,
+        split_strategy: str = "sentence",
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        metadata: Dict[str, Any] = None,
+        content_hash: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], List[BaseNode]]:
         """
-        保存上传的文件
+        准备文档节点：加载、解析、拆分，不写入向量库
         
         Args:
-            file: 上传的文件对象
-            custom_filename: 自定义文件名
+            file_path: 文件路径
+            file_id: 文件ID
+            original_filename: 原始文件名
+            split_strategy: 拆分策略
+            chunk_size: 块大小
+            chunk_overlap: 块重叠
+            metadata: 额外元数据
+            content_hash: 文件内容的SHA-256
             
         Returns:
-            (文件路径, 文件ID, 原始文件名)
+            (处理结果信息, 节点列表)
         """
-        # 生成唯一文件ID
-        file_id = str(uuid.uuid4())
-        
-        # 获取文件扩展名
-        if file.filename:
-            file_ext = Path(file.filename).suffix
-            original_filename = file.filename
-        else:
-            file_ext = ""
-            original_filename = "unknown"
-        
-        # 确定最终文件名
-        if custom_filename:
-            final_filename = secure_filename(custom_filename) + file_ext
-        else:
-            final_filename = f"{file_id}{file_ext}"
-        
-        # 保存文件
-        file_path = self.upload_dir / final_filename
-        file.save(str(file_path))
-        
-        logger.info(f"文件保存成功: {file_path}")
-        return str(file_path), file_id, original_filename
+        try:
+            return _prepare_document_nodes(
+                self.file_loader, file_path, file_id, original_filename,
+                split_strategy, chunk_size, chunk_overlap, metadata,
+                content_hash=content_hash
+            )
+        except Exception as e:
+            logger.error(f"文档处理失败: {str(e)}")
+            # 清理已保存的文件
+            Path(file_path).unlink(missing_ok=True)
+            raise
+
+    def _prepare_nodes_parallel(self, tasks: List[tuple]) -> List[Tuple[Dict[str, Any], List[BaseNode]] | Exception]:
+        """
+        使用进程池并行准备多个文档的节点
+        
+        Args:
+            tasks: 每个文档的参数元组 (file_path, file_id, original_filename,
+                   split_strategy, chunk_size, chunk_overlap, metadata, upload_time[, content_hash])
+            
+        Returns:
+            与tasks顺序一致的结果列表，失败的文档对应异常对象
+        """
+        pool = self._get_pool()
+        futures = [pool.submit(_prepare_worker, task) for task in tasks]
+        
+        outcomes = []
+        for task, future in zip(tasks, futures):
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                file_path = task[0]
+                logger.error(f"文档处理失败: {str(e)}")
+                # 清理已保存的文件
+                Path(file_path).unlink(missing_ok=True)
+                outcomes.append(e)
+        return outcomes
 
     def _process_document(
         self, 
@@ -231,7 +865,9 @@ class DataAPI:
         split_strategy: str = "sentence",
         chunk_size: int = 500,
         chunk_overlap: int = 50,
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        content_hash: Optional[str] = None,
+        custom_filename: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         处理文档：加载、解析、拆分、存储
@@ -244,73 +880,174 @@ class DataAPI:
             chunk_size: 块大小
             chunk_overlap: 块重叠
             metadata: 额外元数据
+            content_hash: 文件内容的SHA-256，已有内容、拆分参数、文件名和元数据都相同的文档时直接复用
+            custom_filename: 用户指定的文件名，参与重复判断
             
         Returns:
             处理结果信息
         """
         start_time = time.time()
         
+        if content_hash:
+            # 文件名和用户元数据随节点保存，只有两者也一致时才视为重复上传
+            metadata = {**(metadata or {}), "metadata_digest": _metadata_digest(metadata)}
+            if custom_filename:
+                metadata["custom_filename"] = custom_filename
+            duplicate = self._find_duplicate_document(content_hash, split_strategy, chunk_size, chunk_overlap,
+                                                      original_filename, custom_filename, metadata)
+            if duplicate:
+                # 新文件与已有文档是同一路径时不能删除，否则已入库文档失去实体文件
+                if os.path.abspath(file_path) != os.path.abspath(duplicate.get("file_path") or ""):
+                    Path(file_path).unlink(missing_ok=True)
+                duplicate["processing_time"] = time.time() - start_time
+                logger.info(f"文档内容已存在，复用文件: {duplicate['file_id']}")
+                return duplicate
+        
+        result, nodes = self._prepare_nodes(
+            file_path, file_id, original_filename,
+            split_strategy, chunk_size, chunk_overlap, metadata, content_hash
+        )
+        
         try:
-            # 1. 加载文档
-            logger.info(f"开始加载文档: {file_path}")
-            documents = self.file_loader.load_documents(file_path)
-            logger.info(f"文档加载完成，共 {len(documents)} 个文档")
-            
-            # 2. 创建文档拆分器
-            splitter = DocumentSplitterFactory.create(
-                split_strategy=split_strategy,
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap
-            )
-            
-            # 3. 拆分文档
-            logger.info("开始拆分文档")
-            nodes = splitter.get_nodes_from_documents(documents, show_progress=True)
-            logger.info(f"文档拆分完成，共 {len(nodes)} 个节点")
-            
-            # 4. 添加元数据
-            base_metadata = {
-                "file_id": file_id,
-                "file_name": original_filename,
-                "file_path": file_path,
-                "upload_time": datetime.now().isoformat(),
-                "split_strategy": split_strategy,
-                "chunk_size": chunk_size,
-                "chunk_overlap": chunk_overlap
-            }
-            
-            if metadata:
-                base_metadata.update(metadata)
-            
-            # 为每个节点添加元数据
-            for node in nodes:
-                if node.metadata is None:
-                    node.metadata = {}
-                node.metadata.update(base_metadata)
-            
             # 5. 存储到向量库
             logger.info("开始存储到向量库")
             self.vector_store.add_data(nodes)
             logger.info("向量库存储完成")
-            
-            processing_time = time.time() - start_time
-            
-            return {
-                "file_id": file_id,
-                "file_name": original_filename,
-                "file_path": file_path,
-                "document_count": len(documents),
-                "node_count": len(nodes),
-                "processing_time": processing_time,
-                "metadata": base_metadata
-            }
-            
         except Exception as e:
             logger.error(f"文档处理失败: {str(e)}")
             # 清理已保存的文件
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            Path(file_path).unlink(missing_ok=True)
             raise
+        
+        self._record_ingested([result])
+        result["processing_time"] = time.time() - start_time
+        return result
+
+    def _find_duplicate_document(self, content_hash: str, split_strategy: str, chunk_size: int,
+                                 chunk_overlap: int, file_name: str, custom_filename: Optional[str],
+                                 metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        查找内容、拆分参数、文件名和用户元数据都相同的已入库文档，只查询文件汇总信息，不加载节点
+        
+        Args:
+            content_hash: 文件内容的SHA-256
+            split_strategy: 拆分策略
+            chunk_size: 块大小
+            chunk_overlap: 块重叠
+            file_name: 原始文件名
+            custom_filename: 用户指定的文件名，未指定时只匹配同样未指定的文档
+            metadata: 本次上传的元数据，包含metadata_digest
+            
+        Returns:
+            已有文档的处理结果信息，不存在时返回None
+        """
+        files, _ = self.vector_store.list_files(offset=0, limit=1, filters={
+            "content_hash": content_hash,
+            "split_strategy": split_strategy,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "file_name": file_name,
+            "custom_filename": custom_filename,
+            "metadata_digest": metadata["metadata_digest"]
+        })
+        if not files:
+            return None
+        
+        file_info = files[0]
+        return {
+            "file_id": file_info["file_id"],
+            "file_name": file_info["file_name"],
+            "file_path": file_info["file_path"],
+            "node_count": file_info["node_count"],
+            "metadata": metadata,
+            "duplicate": True
+        }
+
+    def add_data_change_listener(self, listener: Callable[[], None]):
+        """
+        注册数据变更回调，文档入库或删除成功后调用，例如清空查询结果缓存
+        
+        Args:
+            listener: 无参数的回调函数
+        """
+        self._data_change_listeners.append(listener)
+
+    def _notify_data_changed(self):
+        """通知数据变更，单个回调失败不影响其他回调和当前请求"""
+        for listener in self._data_change_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.warning(f"数据变更回调执行失败: {str(e)}")
+
+    def _record_ingested(self, results: List[Dict[str, Any]]):
+        """
+        将入库成功的文件计入统计缓存，并通知数据变更
+        
+        Args:
+            results: 文件处理结果信息列表
+        """
+        for result in results:
+            try:
+                file_size = os.path.getsize(result["file_path"])
+            except OSError:
+                file_size = None
+            self._stats_cache.add_file(result["file_name"], result["node_count"], file_size)
+        if results:
+            self._notify_data_changed()
+
+    def _add_nodes_in_batches(self, nodes: List[BaseNode], batch_size: int = 500):
+        """
+        分批将节点写入向量库，多个文件的节点合并后按批次并发提交
+        第一批单独写入，向量库首次写入时的建表等初始化不是线程安全的，完成后再并发写入其余批次
+        各批次分别提交，失败时已提交的批次不会回滚，调用方需按file_id清理
+        
+        Args:
+            nodes: 待写入的节点列表
+            batch_size: 每批写入的节点数量
+        """
+        if not nodes:
+            return
+        
+        batch_size = max(1, batch_size)
+        batches = [nodes[start:start + batch_size] for start in range(0, len(nodes), batch_size)]
+        logger.info(f"开始批量存储到向量库，共 {len(nodes)} 个节点，{len(batches)} 个批次")
+        self.vector_store.add_data(batches[0])
+        if len(batches) > 1:
+            asyncio.run(self._add_batches_concurrently(batches[1:]))
+        logger.info("向量库批量存储完成")
+
+    def _discard_failed_group(self, results: List[Dict[str, Any]]):
+        """
+        批量写入失败后清理整组文件：删除已提交批次写入的节点，再删除物理文件，
+        避免向量库中残留指向已删除文件的节点
+        
+        Args:
+            results: 写入失败的文件处理结果信息列表
+        """
+        if not results:
+            return
+        try:
+            self.vector_store.delete_data(filters={"file_id": [result["file_id"] for result in results]})
+        except Exception as e:
+            logger.error(f"清理写入失败文件的节点时出错: {str(e)}")
+        for result in results:
+            Path(result["file_path"]).unlink(missing_ok=True)
+
+    async def _add_batches_concurrently(self, batches: List[List[BaseNode]]):
+        """
+        并发写入多个节点批次，并发数受INSERT_MAX_CONCURRENCY限制
+        
+        Args:
+            batches: 节点批次列表
+        """
+        semaphore = asyncio.Semaphore(INSERT_MAX_CONCURRENCY)
+        
+        async def _add_batch(batch: List[BaseNode]):
+            async with semaphore:
+                await self.vector_store.add_data_async(batch)
+        
+        await asyncio.gather(*(_add_batch(batch) for batch in batches))
 
     def _register_routes(self):
         """注册API路由"""
@@ -353,6 +1090,7 @@ class DataAPI:
             - split_strategy: 拆分策略 (可选，默认: sentence)
             - chunk_size: 块大小 (可选，默认: 500)
             - chunk_overlap: 块重叠 (可选，默认: 50)
+            - batch_size: 向量库批量写入的节点数 (可选，默认: 500)
             - metadata: JSON格式的额外元数据 (可选)
             
             返回格式:
@@ -374,7 +1112,8 @@ class DataAPI:
         @self.app.route('/api/data/import', methods=['POST'])
         def import_from_directory():
             """
-            从目录批量导入文档
+            从目录批量导入文档，文件默认复制到上传目录；
+            配置IMPORT_HARDLINK=true时改为硬链接，源文件之后的修改会影响下载内容
             
             请求体格式:
             {
@@ -384,6 +1123,7 @@ class DataAPI:
                 "split_strategy": "sentence",
                 "chunk_size": 500,
                 "chunk_overlap": 50,
+                "batch_size": 500,
                 "metadata": {}
             }
             
@@ -526,51 +1266,74 @@ class DataAPI:
     def _handle_upload(self) -> tuple:
         """处理单个文档上传"""
         try:
-            # 检查文件
-            if 'file' not in request.files:
+            if request.mimetype != 'multipart/form-data':
                 return jsonify({
                     "success": False,
                     "message": "未找到上传文件"
                 }), 400
             
-            file = request.files['file']
-            if file.filename == '':
-                return jsonify({
-                    "success": False,
-                    "message": "未选择文件"
-                }), 400
+            # 流式解析请求体，文件直接写入上传目录
+            file_target, form = self._parse_upload_stream('file')
             
-            if not self._allowed_file(file.filename):
+            # 检查文件
+            if not file_target.saved_files:
+                if not file_target.rejected_files:
+                    return jsonify({
+                        "success": False,
+                        "message": "未找到上传文件"
+                    }), 400
+                
+                if file_target.rejected_files[0] == '':
+                    return jsonify({
+                        "success": False,
+                        "message": "未选择文件"
+                    }), 400
+                
                 return jsonify({
                     "success": False,
                     "message": f"不支持的文件类型，支持的类型: {', '.join(self.allowed_extensions)}"
                 }), 400
             
-            # 获取参数
-            custom_filename = request.form.get('filename')
-            split_strategy = request.form.get('split_strategy', 'sentence')
-            chunk_size = int(request.form.get('chunk_size', 500))
-            chunk_overlap = int(request.form.get('chunk_overlap', 50))
-            
-            # 解析元数据
-            metadata = {}
-            if 'metadata' in request.form:
-                import json
-                try:
-                    metadata = json.loads(request.form['metadata'])
-                except json.JSONDecodeError:
-                    return jsonify({
-                        "success": False,
-                        "message": "元数据格式错误，请使用有效的JSON格式"
-                    }), 400
+            # 只处理第一个文件
+            file_path, file_id, original_filename, content_hash = file_target.saved_files[0]
+            for extra_path, *_ in file_target.saved_files[1:]:
+                Path(extra_path).unlink(missing_ok=True)
+            file_target.saved_files = file_target.saved_files[:1]
             
-            # 保存文件
-            file_path, file_id, original_filename = self._save_uploaded_file(file, custom_filename)
+            try:
+                # 获取参数
+                custom_filename = form.get('filename')
+                split_strategy = form.get('split_strategy', 'sentence')
+                chunk_size = int(form.get('chunk_size', 500))
+                chunk_overlap = int(form.get('chunk_overlap', 50))
+                
+                # 解析元数据
+                metadata = {}
+                if 'metadata' in form:
+                    try:
+                        metadata = orjson.loads(form['metadata'])
+                    except orjson.JSONDecodeError:
+                        file_target.discard()
+                        return jsonify({
+                            "success": False,
+                            "message": "元数据格式错误，请使用有效的JSON格式"
+                        }), 400
+                
+                # 使用自定义文件名
+                if custom_filename:
+                    final_path = _reserve_unique_path(
+                        self.upload_dir / (_safe_filename(custom_filename) + Path(original_filename).suffix)
+                    )
+                    os.replace(file_path, final_path)
+                    file_path = str(final_path)
+            except Exception:
+                file_target.discard()
+                raise
             
             # 处理文档
             result = self._process_document(
                 file_path, file_id, original_filename,
-                split_strategy, chunk_size, chunk_overlap, metadata
+                split_strategy, chunk_size, chunk_overlap, metadata, content_hash, custom_filename
             )
             
             return jsonify({
@@ -589,68 +1352,89 @@ class DataAPI:
     def _handle_batch_upload(self) -> tuple:
         """处理批量文档上传"""
         try:
-            # 检查文件
-            if 'files' not in request.files:
+            if request.mimetype != 'multipart/form-data':
                 return jsonify({
                     "success": False,
                     "message": "未找到上传文件"
                 }), 400
             
-            files = request.files.getlist('files')
-            if not files or len(files) == 0:
+            # 流式解析请求体，文件直接写入上传目录
+            file_target, form = self._parse_upload_stream('files')
+            
+            # 检查文件
+            total_files = len(file_target.saved_files) + len(file_target.rejected_files)
+            if total_files == 0:
                 return jsonify({
                     "success": False,
-                    "message": "未选择文件"
+                    "message": "未找到上传文件"
                 }), 400
             
-            # 获取参数
-            split_strategy = request.form.get('split_strategy', 'sentence')
-            chunk_size = int(request.form.get('chunk_size', 500))
-            chunk_overlap = int(request.form.get('chunk_overlap', 50))
-            
-            # 解析元数据
-            metadata = {}
-            if 'metadata' in request.form:
-                import json
-                try:
-                    metadata = json.loads(request.form['metadata'])
-                except json.JSONDecodeError:
-                    return jsonify({
-                        "success": False,
-                        "message": "元数据格式错误，请使用有效的JSON格式"
-                    }), 400
+            try:
+                # 获取参数
+                split_strategy = form.get('split_strategy', 'sentence')
+                chunk_size = int(form.get('chunk_size', 500))
+                chunk_overlap = int(form.get('chunk_overlap', 50))
+                batch_size = int(form.get('batch_size', 500))
+                
+                # 解析元数据
+                metadata = {}
+                if 'metadata' in form:
+                    try:
+                        metadata = orjson.loads(form['metadata'])
+                    except orjson.JSONDecodeError:
+                        file_target.discard()
+                        return jsonify({
+                            "success": False,
+                            "message": "元数据格式错误，请使用有效的JSON格式"
+                        }), 400
+            except Exception:
+                file_target.discard()
+                raise
             
             uploaded_files = []
-            failed_files = []
+            failed_files = [{
+                "filename": filename,
+                "error": "不支持的文件类型或文件名为空"
+            } for filename in file_target.rejected_files]
+            all_nodes = []
             total_time = time.time()
             
-            for file in files:
-                try:
-                    if file.filename == '' or not self._allowed_file(file.filename):
-                        failed_files.append({
-                            "filename": file.filename,
-                            "error": "不支持的文件类型或文件名为空"
-                        })
-                        continue
-                    
-                    # 保存文件
-                    file_path, file_id, original_filename = self._save_uploaded_file(file)
-                    
-                    # 处理文档
-                    result = self._process_document(
-                        file_path, file_id, original_filename,
-                        split_strategy, chunk_size, chunk_overlap, metadata
-                    )
-                    
-                    uploaded_files.append(result)
-                    
-                except Exception as e:
+            # 在进程池中并行处理文档，节点暂存后统一写入向量库
+            upload_time = datetime.now().isoformat()
+            tasks = [
+                (file_path, file_id, original_filename, split_strategy, chunk_size, chunk_overlap, metadata,
+                 upload_time, content_hash)
+                for file_path, file_id, original_filename, content_hash in file_target.saved_files
+            ]
+            outcomes = self._prepare_nodes_parallel(tasks)
+            
+            for (_, _, original_filename, _), outcome in zip(file_target.saved_files, outcomes):
+                if isinstance(outcome, Exception):
                     failed_files.append({
-                        "filename": file.filename,
+                        "filename": original_filename,
+                        "error": str(outcome)
+                    })
+                    logger.error(f"处理文件 {original_filename} 失败: {str(outcome)}")
+                    continue
+                
+                result, nodes = outcome
+                uploaded_files.append(result)
+                all_nodes.extend(nodes)
+            
+            # 批量存储到向量库
+            try:
+                self._add_nodes_in_batches(all_nodes, batch_size)
+            except Exception as e:
+                logger.error(f"批量存储到向量库失败: {str(e)}")
+                self._discard_failed_group(uploaded_files)
+                for result in uploaded_files:
+                    failed_files.append({
+                        "filename": result["file_name"],
                         "error": str(e)
                     })
-                    logger.error(f"处理文件 {file.filename} 失败: {str(e)}")
+                uploaded_files = []
             
+            self._record_ingested(uploaded_files)
             total_time = time.time() - total_time
             
             return jsonify({
@@ -658,7 +1442,7 @@ class DataAPI:
                 "data": {
                     "uploaded_files": uploaded_files,
                     "failed_files": failed_files,
-                    "total_files": len(files),
+                    "total_files": total_files,
                     "success_count": len(uploaded_files),
                     "fail_count": len(failed_files),
                     "total_processing_time": total_time
@@ -698,51 +1482,40 @@ class DataAPI:
             chunk_size = data.get('chunk_size', 500)
             chunk_overlap = data.get('chunk_overlap', 50)
             metadata = data.get('metadata', {})
+            batch_size = int(data.get('batch_size', 500))
             
-            # 查找文件
-            if recursive:
-                files = list(directory_path.rglob(file_pattern))
+            # 惰性查找支持的文件类型，边扫描边导入
+            if '/' in file_pattern:
+                # 含路径的模式仍交给glob处理
+                files = directory_path.rglob(file_pattern) if recursive else directory_path.glob(file_pattern)
+                supported_files = (f for f in files if f.is_file() and self._allowed_file(f.name))
             else:
-                files = list(directory_path.glob(file_pattern))
-            
-            # 过滤支持的文件类型
-            supported_files = [f for f in files if f.is_file() and self._allowed_file(f.name)]
-            
-            if not supported_files:
-                return jsonify({
-                    "success": False,
-                    "message": "目录中未找到支持的文件类型"
-                }), 400
+                supported_files = self._iter_supported_files(directory_path, recursive, file_pattern)
             
             imported_files = []
             failed_files = []
+            total_files = 0
             total_time = time.time()
+            upload_time = datetime.now().isoformat()
             
+            # 每累积一组文件即处理并写入向量库，内存占用与目录规模无关
+            group = []
             for file_path in supported_files:
-                try:
-                    # 生成文件ID
-                    file_id = str(uuid.uuid4())
-                    
-                    # 复制文件到存储目录
-                    dest_path = self.upload_dir / f"{file_id}{file_path.suffix}"
-                    shutil.copy2(str(file_path), str(dest_path))
-                    
-                    # 处理文档
-                    result = self._process_document(
-                        str(dest_path), file_id, file_path.name,
-                        split_strategy, chunk_size, chunk_overlap, metadata
-                    )
-                    
-                    result['source_path'] = str(file_path)
-                    imported_files.append(result)
-                    
-                except Exception as e:
-                    failed_files.append({
-                        "filename": file_path.name,
-                        "source_path": str(file_path),
-                        "error": str(e)
-                    })
-                    logger.error(f"导入文件 {file_path} 失败: {str(e)}")
+                group.append(file_path)
+                total_files += 1
+                if len(group) >= IMPORT_FLUSH_FILES:
+                    self._import_file_group(group, split_strategy, chunk_size, chunk_overlap, metadata,
+                                            upload_time, batch_size, imported_files, failed_files)
+                    group = []
+            if group:
+                self._import_file_group(group, split_strategy, chunk_size, chunk_overlap, metadata,
+                                        upload_time, batch_size, imported_files, failed_files)
+            
+            if not total_files:
+                return jsonify({
+                    "success": False,
+                    "message": "目录中未找到支持的文件类型"
+                }), 400
             
             total_time = time.time() - total_time
             
@@ -751,7 +1524,7 @@ class DataAPI:
                 "data": {
                     "imported_files": imported_files,
                     "failed_files": failed_files,
-                    "total_files": len(supported_files),
+                    "total_files": total_files,
                     "success_count": len(imported_files),
                     "fail_count": len(failed_files),
                     "total_processing_time": total_time
@@ -766,6 +1539,82 @@ class DataAPI:
                 "message": f"目录导入失败: {str(e)}"
             }), 500
 
+    def _import_file_group(self, group: List[Path], split_strategy: str, chunk_size: int, chunk_overlap: int,
+                           metadata: Dict[str, Any], upload_time: str, batch_size: int,
+                           imported_files: List[Dict[str, Any]], failed_files: List[Dict[str, Any]]) -> None:
+        """
+        导入一组文件：放入存储目录、并行处理并写入向量库
+        
+        Args:
+            group: 源文件路径列表
+            split_strategy: 拆分策略
+            chunk_size: 块大小
+            chunk_overlap: 块重叠
+            metadata: 额外元数据
+            upload_time: 上传时间
+            batch_size: 写入向量库的批次大小
+            imported_files: 导入成功的文件信息，原地追加
+            failed_files: 导入失败的文件信息，原地追加
+        """
+        copied_files = []
+        tasks = []
+        # 一次性生成本组全部文件ID
+        file_ids = _generate_file_ids(len(group))
+        for file_path, file_id in zip(group, file_ids):
+            try:
+                # 将文件放入存储目录
+                dest_path = self.upload_dir / f"{file_id}{file_path.suffix}"
+                self._link_or_copy(file_path, dest_path)
+                
+                copied_files.append(file_path)
+                tasks.append((str(dest_path), file_id, file_path.name,
+                              split_strategy, chunk_size, chunk_overlap, metadata, upload_time))
+                
+            except Exception as e:
+                failed_files.append({
+                    "filename": file_path.name,
+                    "source_path": str(file_path),
+                    "error": str(e)
+                })
+                logger.error(f"导入文件 {file_path} 失败: {str(e)}")
+        
+        # 在进程池中并行处理文档，节点暂存后统一写入向量库
+        outcomes = self._prepare_nodes_parallel(tasks)
+        
+        group_files = []
+        group_nodes = []
+        for file_path, outcome in zip(copied_files, outcomes):
+            if isinstance(outcome, Exception):
+                failed_files.append({
+                    "filename": file_path.name,
+                    "source_path": str(file_path),
+                    "error": str(outcome)
+                })
+                logger.error(f"导入文件 {file_path} 失败: {str(outcome)}")
+                continue
+            
+            result, nodes = outcome
+            result['source_path'] = str(file_path)
+            group_files.append(result)
+            group_nodes.extend(nodes)
+        
+        # 批量存储到向量库
+        try:
+            self._add_nodes_in_batches(group_nodes, batch_size)
+        except Exception as e:
+            logger.error(f"批量存储到向量库失败: {str(e)}")
+            self._discard_failed_group(group_files)
+            for result in group_files:
+                failed_files.append({
+                    "filename": result["file_name"],
+                    "source_path": result["source_path"],
+                    "error": str(e)
+                })
+            return
+        
+        self._record_ingested(group_files)
+        imported_files.extend(group_files)
+
     def _handle_delete(self) -> tuple:
         """处理文档删除"""
         try:
@@ -802,16 +1651,15 @@ class DataAPI:
                                 file_paths.add(node.metadata['file_path'])
                         
                         # 删除物理文件
-                        for file_path in file_paths:
-                            if os.path.exists(file_path):
-                                os.remove(file_path)
-                                physical_files_deleted += 1
-                                logger.info(f"已删除物理文件: {file_path}")
+                        physical_files_deleted = self._remove_files(file_paths)
                     except Exception as e:
                         logger.warning(f"删除物理文件时出错: {str(e)}")
                 
                 # 从向量库删除
                 self.vector_store.delete_data(filters={"file_id": file_ids})
+                self._file_info_cache.evict(file_ids)
+                self._stats_cache.invalidate()
+                self._notify_data_changed()
                 
                 deleted_file_ids = file_ids
             
@@ -832,11 +1680,7 @@ class DataAPI:
                     
                     # 删除物理文件
                     if delete_files:
-                        for file_path in file_paths:
-                            if os.path.exists(file_path):
-                                os.remove(file_path)
-                                physical_files_deleted += 1
-                                logger.info(f"已删除物理文件: {file_path}")
+                        physical_files_deleted = self._remove_files(file_paths)
                     
                     deleted_file_ids = list(file_ids_to_delete)
                     
@@ -845,6 +1689,10 @@ class DataAPI:
                 
                 # 从向量库删除
                 self.vector_store.delete_data(filters=filters)
+                # 按条件删除时无法确定全部受影响的文件，清空缓存
+                self._file_info_cache.clear()
+                self._stats_cache.invalidate()
+                self._notify_data_changed()
             
             return jsonify({
                 "success": True,
@@ -884,35 +1732,10 @@ class DataAPI:
                 # 这里简化处理，实际可能需要更复杂的时间范围查询
                 filters['upload_time'] = f"%{upload_time_start}%"
             
-            # 获取数据
-            nodes = self.vector_store.get_data(filters=filters if filters else None)
-            
-            # 按文件分组
-            files_dict = {}
-            for node in nodes:
-                if node.metadata and 'file_id' in node.metadata:
-                    file_id = node.metadata['file_id']
-                    if file_id not in files_dict:
-                        files_dict[file_id] = {
-                            "file_id": file_id,
-                            "file_name": node.metadata.get('file_name', 'unknown'),
-                            "file_path": node.metadata.get('file_path', ''),
-                            "upload_time": node.metadata.get('upload_time', ''),
-                            "split_strategy": node.metadata.get('split_strategy', ''),
-                            "chunk_size": node.metadata.get('chunk_size', 0),
-                            "chunk_overlap": node.metadata.get('chunk_overlap', 0),
-                            "node_count": 0
-                        }
-                    files_dict[file_id]["node_count"] += 1
-            
-            # 转换为列表并分页
-            documents = list(files_dict.values())
-            total = len(documents)
-            total_pages = (total + page_size - 1) // page_size
-            
+            # 由向量存储完成按文件分组和分页
             start_idx = (page - 1) * page_size
-            end_idx = start_idx + page_size
-            page_documents = documents[start_idx:end_idx]
+            page_documents, total = self.vector_store.list_files(start_idx, page_size, filters)
+            total_pages = (total + page_size - 1) // page_size
             
             return jsonify({
                 "success": True,
@@ -933,45 +1756,54 @@ class DataAPI:
                 "message": f"文档列表查询失败: {str(e)}"
             }), 500
 
+    def _compute_stats(self) -> Dict[str, Any]:
+        """
+        遍历全部节点和上传目录，全量计算统计信息
+        
+        Returns:
+            包含total_nodes、total_files、file_types、storage_bytes的字典
+        """
+        nodes = self.vector_store.get_data()
+        
+        total_nodes = len(nodes)
+        
+        # 每个文件取首个节点的文件名，按扩展名计数
+        file_names = {}
+        for metadata in (node.metadata for node in nodes if node.metadata):
+            file_id = metadata.get('file_id')
+            if file_id:
+                file_names.setdefault(file_id, metadata.get('file_name', ''))
+        file_types = Counter(map(_file_extension, file_names.values()))
+        file_types.pop('', None)
+        
+        # 计算存储大小（简化版本）
+        storage_bytes = None
+        try:
+            if self.upload_dir.exists():
+                storage_bytes = sum(entry.stat(follow_symlinks=False).st_size for entry in _iter_files(str(self.upload_dir)))
+        except Exception as e:
+            logger.warning(f"计算存储大小失败: {str(e)}")
+        
+        return {
+            "total_nodes": total_nodes,
+            "total_files": len(file_names),
+            "file_types": dict(file_types),
+            "storage_bytes": storage_bytes
+        }
+
     def _handle_stats(self) -> tuple:
         """处理统计信息查询"""
         try:
-            # 获取所有节点
-            nodes = self.vector_store.get_data()
+            # 优先使用缓存的统计结果，缓存失效时才全量统计
+            stats = self._stats_cache.get()
+            if stats is None:
+                stats = self._compute_stats()
+                self._stats_cache.set(**stats)
             
-            # 统计信息
-            total_nodes = len(nodes)
-            files_dict = {}
-            file_types = {}
-            
-            for node in nodes:
-                if node.metadata:
-                    # 文件统计
-                    file_id = node.metadata.get('file_id')
-                    if file_id and file_id not in files_dict:
-                        files_dict[file_id] = True
-                        
-                        # 文件类型统计
-                        file_name = node.metadata.get('file_name', '')
-                        if '.' in file_name:
-                            ext = file_name.split('.')[-1].lower()
-                            file_types[ext] = file_types.get(ext, 0) + 1
-            
-            total_files = len(files_dict)
-            
-            # 计算存储大小（简化版本）
-            storage_size = "未知"
-            try:
-                if self.upload_dir.exists():
-                    total_size = sum(f.stat().st_size for f in self.upload_dir.rglob('*') if f.is_file())
-                    if total_size > 1024 * 1024 * 1024:
-                        storage_size = f"{total_size / (1024 * 1024 * 1024):.2f}GB"
-                    elif total_size > 1024 * 1024:
-                        storage_size = f"{total_size / (1024 * 1024):.2f}MB"
-                    else:
-                        storage_size = f"{total_size / 1024:.2f}KB"
-            except Exception as e:
-                logger.warning(f"计算存储大小失败: {str(e)}")
+            total_nodes = stats["total_nodes"]
+            total_files = stats["total_files"]
+            file_types = dict(stats["file_types"])
+            storage_size = "未知" if stats["storage_bytes"] is None else _format_file_size(stats["storage_bytes"])
             
             return jsonify({
                 "success": True,
@@ -1011,8 +1843,8 @@ class DataAPI:
                     "message": "文档不存在或已被删除"
                 }), 404
             
-            # 添加下载链接
-            file_info["download_url"] = f"/api/data/download/{file_id}"
+            # 添加下载链接，不修改缓存中的文件信息
+            file_info = {**file_info, "download_url": f"/api/data/download/{file_id}"}
             
             return jsonify({
                 "success": True,
@@ -1046,27 +1878,30 @@ class DataAPI:
                     "message": "文档不存在或已被删除"
                 }), 404
             
-            file_path = file_info["file_path"]
+            directory, filename = os.path.split(file_info["file_path"])
             file_name = file_info["file_name"]
             
-            # 再次确认文件存在
-            if not os.path.exists(file_path):
-                return jsonify({
-                    "success": False,
-                    "message": "文档文件不存在"
-                }), 404
-            
             # 获取MIME类型
             mime_type = self._get_mime_type(file_name)
             
-            # 使用Flask的send_file发送文件
+            # 使用Flask的send_from_directory发送文件
             try:
-                return send_file(
-                    file_path,
+                # conditional=True 支持Range/If-None-Match请求，并交由wsgi.file_wrapper零拷贝发送
+                return send_from_directory(
+                    directory,
+                    filename,
                     mimetype=mime_type,
                     as_attachment=True,
-                    download_name=file_name
+                    download_name=file_name,
+                    conditional=True,
+                    etag=True
                 )
+            except NotFound:
+                # 文件在查询后被删除
+                return jsonify({
+                    "success": False,
+                    "message": "文档文件不存在"
+                }), 404
             except Exception as send_error:
                 logger.error(f"发送文件失败: {str(send_error)}")
                 return jsonify({
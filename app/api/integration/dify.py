@@ -11,13 +11,16 @@ API文档: https://docs.dify.ai/zh-hans/guides/knowledge-base/api-documentation/
 版本: v1.2.0
 """
 
+import hmac
 import logging
 import os
 from datetime import datetime
-from functools import wraps
-from typing import Dict, Any, List, Tuple
+from functools import lru_cache, wraps
+from typing import Annotated, Dict, Any, List, Tuple
 
+import orjson
 from flask import Flask, request, jsonify, Response
+from pydantic import BaseModel, Field, StrictInt, StringConstraints, ValidationError
 
 from app.api.query import QueryAPI
 
@@ -25,6 +28,59 @@ from app.api.query import QueryAPI
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class DifyRetrievalSetting(BaseModel):
+    """Dify检索设置"""
+    top_k: Annotated[StrictInt, Field(ge=1, le=100)] = 5
+    score_threshold: Annotated[float, Field(ge=0, le=1, strict=True)] = 0.0
+
+
+class DifyRetrievalRequest(BaseModel):
+    """Dify检索请求体，由pydantic-core一次完成JSON解析和参数校验"""
+    knowledge_id: Annotated[str, StringConstraints(min_length=1)]
+    query: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+    retrieval_setting: DifyRetrievalSetting = Field(default_factory=DifyRetrievalSetting)
+    metadata_condition: Any = None
+
+
+# 校验失败字段对应的错误信息
+_VALIDATION_MESSAGES = {
+    ('knowledge_id',): "缺少必需参数: knowledge_id",
+    ('query',): "缺少必需参数: query",
+    ('retrieval_setting',): "retrieval_setting必须是对象",
+    ('retrieval_setting', 'top_k'): "top_k必须是1-100之间的整数",
+    ('retrieval_setting', 'score_threshold'): "score_threshold必须是0-1之间的数值",
+}
+
+@lru_cache(maxsize=32)
+def _static_error_body(error_code: int, error_msg: str) -> bytes:
+    """
+    序列化固定内容的错误响应体，相同错误只序列化一次
+    
+    Args:
+        error_code: 错误代码
+        error_msg: 错误消息，不能包含用户输入
+        
+    Returns:
+        JSON格式的响应体
+    """
+    return orjson.dumps({"error_code": error_code, "error_msg": error_msg})
+
+
+def _static_error(error_code: int, error_msg: str) -> Response:
+    """生成固定内容的Dify错误响应，每次请求使用新的Response对象"""
+    return Response(_static_error_body(error_code, error_msg), mimetype='application/json')
+
+
+# Dify比较操作符到内部过滤值的转换，返回None表示该条件无效
+# 相等操作允许空字符串等假值，通配符操作要求值非空
+_COMPARISON_OPERATORS = {
+    'is': lambda v: v,
+    '=': lambda v: v,
+    'contains': lambda v: f"*{v}*" if v else None,
+    'start with': lambda v: f"{v}*" if v else None,
+    'end with': lambda v: f"*{v}" if v else None,
+}
+
 
 class DifyIntegrationAPI:
     """
@@ -84,20 +140,15 @@ class DifyIntegrationAPI:
             auth_header = request.headers.get('Authorization')
             
             if not auth_header:
-                return jsonify(self._error_response(1001, "缺少Authorization请求头")), 401
+                return _static_error(1001, "缺少Authorization请求头"), 401
             
-            # 验证格式：Bearer <api-key>
-            try:
-                scheme, token = auth_header.split(' ', 1)
-                if scheme.lower() != 'bearer':
-                    return jsonify(self._error_response(1001, "无效的Authorization头格式。预期格式为 Bearer <api-key>")), 400
-                
-                # 验证API密钥
-                if self.api_key and token != self.api_key:
-                    return jsonify(self._error_response(1002, "授权失败")), 403
-                    
-            except ValueError:
-                return jsonify(self._error_response(1001, "无效的Authorization头格式。预期格式为 Bearer <api-key>")), 400
+            # 验证格式：Bearer <api-key>，scheme不区分大小写
+            if auth_header[:7].lower() != 'bearer ':
+                return _static_error(1001, "无效的Authorization头格式。预期格式为 Bearer <api-key>"), 400
+            
+            # 验证API密钥，使用常数时间比较避免时序侧信道
+            if self.api_key and not hmac.compare_digest(auth_header[7:].encode(), self.api_key.encode()):
+                return _static_error(1002, "授权失败"), 403
             
             return f(*args, **kwargs)
         
@@ -168,36 +219,25 @@ class DifyIntegrationAPI:
         """
         try:
             # 获取请求数据
-            data = request.get_json()
-            if not data:
-                return jsonify(self._error_response(1001, "请求体不能为空")), 400
-            
-            # 验证必需参数
-            knowledge_id = data.get('knowledge_id')
-            if not knowledge_id:
-                return jsonify(self._error_response(1001, "缺少必需参数: knowledge_id")), 400
+            body = request.get_data()
+            if not body:
+                return _static_error(1001, "请求体不能为空"), 400
             
-            query = data.get('query')
-            if not query or not query.strip():
-                return jsonify(self._error_response(1001, "缺少必需参数: query")), 400
-            
-            retrieval_setting = data.get('retrieval_setting', {})
-            if not isinstance(retrieval_setting, dict):
-                return jsonify(self._error_response(1001, "retrieval_setting必须是对象")), 400
-            
-            # 解析检索设置
-            top_k = retrieval_setting.get('top_k', 5)
-            score_threshold = retrieval_setting.get('score_threshold', 0.0)
-            
-            # 验证参数范围
-            if not isinstance(top_k, int) or top_k <= 0 or top_k > 100:
-                return jsonify(self._error_response(1001, "top_k必须是1-100之间的整数")), 400
+            # 解析并验证参数
+            try:
+                retrieval_request = DifyRetrievalRequest.model_validate_json(body)
+            except ValidationError as e:
+                loc = e.errors()[0]['loc']
+                message = _VALIDATION_MESSAGES.get(loc[:2]) or _VALIDATION_MESSAGES.get(loc[:1], "请求体格式错误")
+                return _static_error(1001, message), 400
             
-            if not isinstance(score_threshold, (int, float)) or score_threshold < 0 or score_threshold > 1:
-                return jsonify(self._error_response(1001, "score_threshold必须是0-1之间的数值")), 400
+            knowledge_id = retrieval_request.knowledge_id
+            query = retrieval_request.query
+            top_k = retrieval_request.retrieval_setting.top_k
+            score_threshold = retrieval_request.retrieval_setting.score_threshold
             
             # 解析元数据条件
-            metadata_condition = data.get('metadata_condition')
+            metadata_condition = retrieval_request.metadata_condition
             filters = self._parse_metadata_condition(metadata_condition) if metadata_condition else {}
             
             logger.info(f"Dify检索请求: knowledge_id={knowledge_id}, query={query[:50]}...")
@@ -259,24 +299,21 @@ class DifyIntegrationAPI:
             if not names or not comparison_operator:
                 continue
             
-            # 处理每个字段名，只支持基础操作
+            # 只支持基础的相等和包含操作
+            convert = _COMPARISON_OPERATORS.get(comparison_operator)
+            if convert is None:
+                # 对于不支持的操作符，记录警告但不影响其他条件
+                logger.warning(f"Dify条件转换: 不支持的操作符 '{comparison_operator}'，已跳过")
+                continue
+            
+            filter_value = convert(value)
+            if filter_value is None:
+                continue
+            
+            # 处理每个字段名
             for name in names:
-                if not isinstance(name, str):
-                    continue
-                
-                # 只支持基础的相等和包含操作
-                if comparison_operator in ['is', '='] and value is not None:
-                    filters[name] = value
-                elif comparison_operator == 'contains' and value:
-                    # 对于包含操作，可以使用通配符格式（如果QueryService支持）
-                    filters[name] = f"*{value}*"
-                elif comparison_operator == 'start with' and value:
-                    filters[name] = f"{value}*"
-                elif comparison_operator == 'end with' and value:
-                    filters[name] = f"*{value}"
-                else:
-                    # 对于不支持的操作符，记录警告但不影响其他条件
-                    logger.warning(f"Dify条件转换: 不支持的操作符 '{comparison_operator}'，已跳过")
+                if isinstance(name, str):
+                    filters[name] = filter_value
         
         # 对于OR逻辑，由于QueryAPI可能不支持，记录警告并使用第一个条件
         if logical_operator.lower() == 'or' and len(conditions) > 1:
@@ -293,65 +330,58 @@ class DifyIntegrationAPI:
             score_threshold: 分数阈值，低于此分数的结果将被过滤
             
         Returns:
-            Dify格式的记录列表
+            Dify格式的记录列表，保持检索（重排）结果的顺序
         """
         dify_records = []
+        # 同一批结果使用相同的检索时间
+        retrieved_at = datetime.now().isoformat()
         
-        for result in results:
-            # 获取分数并应用阈值过滤
-            score = float(result.score) if hasattr(result, 'score') else 0.0
-            if score < score_threshold:
-                continue
-            
+        # 过滤低于阈值的结果，不改变重排后的顺序
+        scored_results = [
+            (score, result)
+            for score, result in ((float(getattr(result, 'score', 0.0) or 0.0), result) for result in results)
+            if score >= score_threshold
+        ]
+        
+        for score, result in scored_results:
             # 获取节点信息
             node = result.node
             content = getattr(node, 'text', str(node))
             node_id = getattr(node, 'id_', '')
+            node_metadata = getattr(node, 'metadata', None) or {}
             
-            # 构建标题
-            title = self._extract_title(node, content)
-            
-            # 构建元数据
-            metadata = {}
-            if hasattr(node, 'metadata') and node.metadata:
-                metadata = dict(node.metadata)
-            
-            # 添加额外的元数据信息
-            metadata.update({
-                'node_id': node_id,
-                'source': 'external_knowledge_base',
-                'retrieved_at': datetime.now().isoformat()
-            })
-            
-            # 构建Dify记录
-            dify_record = {
+            # 构建Dify记录，元数据中添加额外的检索信息
+            dify_records.append({
                 'content': content,
                 'score': round(score, 4),  # 保留4位小数
-                'title': title,
-                'metadata': metadata
-            }
-            
-            dify_records.append(dify_record)
+                'title': self._extract_title(node_metadata, content, node_id),
+                'metadata': {
+                    **node_metadata,
+                    'node_id': node_id,
+                    'source': 'external_knowledge_base',
+                    'retrieved_at': retrieved_at
+                }
+            })
         
         return dify_records
     
     @staticmethod
-    def _extract_title(node: Any, content: str) -> str:
+    def _extract_title(node_metadata: Dict[str, Any], content: str, node_id: str) -> str:
         """
-        从节点或内容中提取标题
+        从节点元数据或内容中提取标题
         
         Args:
-            node: 节点对象
+            node_metadata: 节点元数据
             content: 内容文本
+            node_id: 节点ID
             
         Returns:
             提取的标题
         """
         # 首先尝试从元数据中获取标题
-        if hasattr(node, 'metadata') and node.metadata:
-            title = node.metadata.get('title') or node.metadata.get('name') or node.metadata.get('filename')
-            if title:
-                return str(title)
+        title = node_metadata.get('title') or node_metadata.get('name') or node_metadata.get('filename')
+        if title:
+            return str(title)
         
         # 如果没有元数据标题，从内容中提取前50个字符作为标题
         if content:
@@ -361,7 +391,6 @@ class DifyIntegrationAPI:
             return title
         
         # 最后使用节点ID作为标题
-        node_id = getattr(node, 'id_', '')
         return f"文档 {node_id}" if node_id else "未知文档"
 
     @staticmethod
@@ -1,23 +1,47 @@
+import hashlib
 import logging
 import time
 from datetime import datetime
 from typing import Dict, Any, List, Tuple
 
+import orjson
 from flask import Flask, request, jsonify, Response
 from llama_index.core.schema import NodeWithScore
 
+from app.config.config import QUERY_CONFIG, SEMANTIC_CACHE_CONFIG
+from app.model.embedding_model import get_embedding_model
+from app.query_construction.semantic_cache import SemanticQueryCache, make_query_cache_key
 from app.query_construction.service import QueryService
 from app.query_processing.query_post.post_processor_chain import PostProcessorChain
 from app.query_processing.query_post.rerank_processor import RerankProcessor
 from app.query_processing.query_pre.pre_query_chain import PreQueryProcessorChain
 from app.query_processing.query_pre.question_optimization_processor import QuestionOptimizerProcessor
 from app.query_processing.query_pre.sensitive_word_processor import SensitiveWordProcessor
+from app.utils.ttl_cache import TTLCache
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _digest_key(*parts: str) -> bytes:
+    """
+    将多个字符串摘要为固定16字节的缓存键
+
+    Args:
+        *parts: 参与摘要的字符串
+
+    Returns:
+        blake2b摘要
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode())
+        # 分隔符避免不同拆分方式拼接出相同内容
+        digest.update(b'\0')
+    return digest.digest()
+
+
 class QueryAPI:
     """
     查询API类，提供完整的查询功能
@@ -34,6 +58,9 @@ class QueryAPI:
         self.query_service = None
         self.pre_processor_chain = None
         self.post_processor_chain = None
+        self.semantic_cache = None
+        # 重排结果缓存，相同查询和相同候选节点直接复用重排结果
+        self.rerank_cache = TTLCache(maxsize=4096, ttl=900.0)
 
         if app is not None:
             self.init_app(app)
@@ -50,12 +77,13 @@ class QueryAPI:
         # 初始化查询服务
         self.query_service = QueryService()
 
-        # 初始化查询前处理链
-        pre_processors = [
-            SensitiveWordProcessor(),  # 敏感词处理
-            QuestionOptimizerProcessor()  # 问题优化
-        ]
-        self.pre_processor_chain = PreQueryProcessorChain(pre_processors)
+        # 初始化查询前处理链，未启用时不创建，查询直接使用原始文本
+        if QUERY_CONFIG["pre_processing_enabled"]:
+            pre_processors = [
+                SensitiveWordProcessor(),  # 敏感词处理
+                QuestionOptimizerProcessor()  # 问题优化
+            ]
+            self.pre_processor_chain = PreQueryProcessorChain(pre_processors)
 
         # 初始化查询后处理链
         post_processors = [
@@ -63,9 +91,23 @@ class QueryAPI:
         ]
         self.post_processor_chain = PostProcessorChain(post_processors)
 
+        # 初始化语义查询缓存
+        if SEMANTIC_CACHE_CONFIG["enabled"]:
+            self.semantic_cache = SemanticQueryCache(
+                get_embedding_model(),
+                threshold=SEMANTIC_CACHE_CONFIG["threshold"],
+                max_items=SEMANTIC_CACHE_CONFIG["max_items"],
+                ttl=SEMANTIC_CACHE_CONFIG["ttl"]
+            )
+
         # 注册路由
         self._register_routes()
 
+    def clear_result_caches(self):
+        """清空语义查询缓存，文档入库或删除后调用，避免返回已删除文档或遗漏新文档"""
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
+
     def execute_query(
             self,
             query_text: str,
@@ -106,13 +148,27 @@ class QueryAPI:
         processed_query = query_text
         if enable_pre_processing and self.pre_processor_chain:
             try:
-                processed_query = self.pre_processor_chain.postprocess_nodes(query_text)
+                processed_query = self.pre_processor_chain.run(query_text)
                 logger.info(f"查询前处理完成: {processed_query[:50]}...")
             except Exception as e:
                 logger.warning(f"查询前处理失败: {str(e)}")
                 # 即使前处理失败，也继续使用原始查询
                 processed_query = query_text
 
+        # 查询语义缓存，相近的查询且参数一致时直接返回
+        cache_vector = cache_key = None
+        if self.semantic_cache is not None:
+            try:
+                cache_vector = self.semantic_cache.embed(processed_query)
+                cache_key = make_query_cache_key(top_k, filters, params, enable_post_processing)
+                cached = self.semantic_cache.get(cache_vector, cache_key)
+                if cached is not None:
+                    logger.info("命中语义查询缓存")
+                    return cached
+            except Exception as e:
+                logger.warning(f"语义查询缓存不可用: {str(e)}")
+                cache_vector = None
+
         # 执行查询
         results = self.query_service.query(
             query_text=processed_query,
@@ -124,11 +180,22 @@ class QueryAPI:
         # 查询后处理
         if enable_post_processing and self.post_processor_chain:
             try:
-                results = self.post_processor_chain.postprocess_nodes(results, processed_query)
-                logger.info("查询后处理完成")
+                rerank_key = _digest_key(processed_query, *sorted(result.node.id_ for result in results))
+                reranked = self.rerank_cache.get(rerank_key)
+                if reranked is None:
+                    reranked = self.post_processor_chain.postprocess_nodes(results, processed_query)
+                    self.rerank_cache.set(rerank_key, reranked)
+                    logger.info("查询后处理完成")
+                else:
+                    logger.info("命中重排结果缓存")
+                results = list(reranked)
             except Exception as e:
                 logger.warning(f"查询后处理失败: {str(e)}")
-                # 即使后处理失败，也返回原始结果
+                # 即使后处理失败，也返回原始结果，但不写入缓存
+                cache_vector = None
+
+        if cache_vector is not None:
+            self.semantic_cache.put(cache_vector, cache_key, results)
 
         return results
 
@@ -233,14 +300,9 @@ class QueryAPI:
             enable_post_processing = data.get('enable_post_processing', True)
             include_metadata = data.get('include_metadata', True)
 
-            # 构建查询参数
-            params = {}
-            if 'mode' in data:
-                params['mode'] = data['mode']
-            if 'alpha' in data:
-                params['alpha'] = data['alpha']
-
-
+            # 构建查询参数，检索模式在此确定一次
+            params = self._parse_query_params(data)
+            search_mode = params['mode']
 
             # 执行查询
             results = self._query(query_text, top_k, filters, params, enable_pre_processing, enable_post_processing)
@@ -250,9 +312,6 @@ class QueryAPI:
 
             execution_time = time.time() - start_time
 
-            # 确定使用的搜索模式
-            search_mode = self.query_service.router.determine_mode(params)
-
             response_data = {
                 "results": formatted_results,
                 # "processed_query": processed_query if enable_pre_processing else query_text,
@@ -265,11 +324,13 @@ class QueryAPI:
 
             logger.info(f"查询完成，返回{len(formatted_results)}个结果，耗时{execution_time:.4f}秒")
 
-            return jsonify({
+            # 结果可能包含大量长文本，直接用orjson序列化为bytes，省去jsonify的str中转和再次编码
+            body = orjson.dumps({
                 "success": True,
                 "data": response_data,
                 "message": "查询成功"
-            }), 200
+            }, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+            return Response(body, mimetype='application/json'), 200
 
         except Exception as e:
             logger.error(f"查询处理失败: {str(e)}", exc_info=True)
@@ -278,6 +339,24 @@ class QueryAPI:
                 "message": f"查询处理失败: {str(e)}"
             }), 500
 
+    def _parse_query_params(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        解析请求中的检索参数，检索模式经路由器解析后写回参数，后续检索不再重复判断
+
+        Args:
+            data: 请求体
+
+        Returns:
+            查询参数，mode必定为有效的检索模式
+        """
+        params = {}
+        if 'mode' in data:
+            params['mode'] = data['mode']
+        if 'alpha' in data:
+            params['alpha'] = float(data['alpha'])
+        params['mode'] = self.query_service.router.determine_mode(params)
+        return params
+
     @staticmethod
     def _serialize_node_with_score(results: List, include_metadata: bool = True) -> List[Dict[str, Any]]:
         """
@@ -290,33 +369,33 @@ class QueryAPI:
         Returns:
             序列化后的结果列表
         """
-        serialized_results = []
+        serialized_results = [None] * len(results)
 
-        for result in results:
+        for i, result in enumerate(results):
+            node = result.node
+            score = result.score
+            text = getattr(node, 'text', None)
             # 基本的序列化信息
             serialized_result = {
-                "node_id": getattr(result.node, 'id_', None),
-                "text": getattr(result.node, 'text', str(result.node)),
-                "score": float(result.score) if hasattr(result, 'score') else 0.0,
+                "node_id": node.id_,
+                "text": text if text is not None else str(node),
+                "score": float(score) if score is not None else 0.0,
             }
 
             # 可选的元数据
-            if include_metadata and hasattr(result.node, 'metadata') and result.node.metadata:
-                serialized_result["metadata"] = result.node.metadata
-
-            # 可选的其他NodeWithScore属性
-            if hasattr(result, 'node') and result.node:
-                # 如果有embedding信息
-                if hasattr(result.node, 'embedding') and result.node.embedding:
-                    # 只返回embedding的维度信息，不返回具体数值（避免响应过大）
-                    serialized_result["embedding_dim"] = len(result.node.embedding)
-
-                # 如果有relationships信息
-                if hasattr(result.node, 'relationships') and result.node.relationships:
-                    serialized_result["has_relationships"] = True
-                    serialized_result["relationship_count"] = len(result.node.relationships)
-
-            serialized_results.append(serialized_result)
+            if include_metadata and node.metadata:
+                serialized_result["metadata"] = node.metadata
+
+            # 只返回embedding的维度信息，不返回具体数值（避免响应过大）
+            if node.embedding:
+                serialized_result["embedding_dim"] = len(node.embedding)
+
+            # 如果有relationships信息
+            if node.relationships:
+                serialized_result["has_relationships"] = True
+                serialized_result["relationship_count"] = len(node.relationships)
+
+            serialized_results[i] = serialized_result
 
         return serialized_results
 
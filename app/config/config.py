@@ -1,43 +1,59 @@
 import os
+from types import MappingProxyType
 
 from dotenv import load_dotenv
 
-# 加载环境变量
+# 加载环境变量，整个进程只读取一次.env
 load_dotenv()
 
+# 导入时的环境变量只读快照，配置项统一从快照取值
+ENV = MappingProxyType(dict(os.environ))
+
 # 向量库类型配置
-VECTOR_STORE_TYPE = os.getenv("VECTOR_STORE_TYPE", "pg_vector")
+VECTOR_STORE_TYPE = ENV.get("VECTOR_STORE_TYPE", "pg_vector")
 
 # 全文搜索引擎类型配置
-FULLTEXT_STORE_TYPE = os.getenv("FULLTEXT_STORE_TYPE", "es")
+FULLTEXT_STORE_TYPE = ENV.get("FULLTEXT_STORE_TYPE", "es")
 
 # PostgreSQL向量库配置
 PG_CONFIG = {
-    "host": os.getenv("PG_HOST", "localhost"),
-    "port": int(os.getenv("PG_PORT", "5432")),
-    "user": os.getenv("PG_USER", "root"),
-    "password": os.getenv("PG_PASSWORD", "123456"),
-    "database": os.getenv("PG_DATABASE", "vector_db"),
-    "table_name": os.getenv("PG_VECTOR_TABLE", "document_embeddings"),
+    "host": ENV.get("PG_HOST", "localhost"),
+    "port": int(ENV.get("PG_PORT", "5432")),
+    "user": ENV.get("PG_USER", "root"),
+    "password": ENV.get("PG_PASSWORD", "123456"),
+    "database": ENV.get("PG_DATABASE", "vector_db"),
+    "table_name": ENV.get("PG_VECTOR_TABLE", "document_embeddings"),
+    # 以halfvec（半精度）存储向量，存储和检索时读取的字节数减半；只对新建的数据表生效
+    "use_halfvec": ENV.get("PG_USE_HALFVEC", "false").lower() == "true",
+    # 建表时创建HNSW索引，ef_search为检索时的候选数量，0表示不创建索引
+    "hnsw_ef_search": int(ENV.get("PG_HNSW_EF_SEARCH", "0")),
+    # 连接池配置，混合检索每次占用两个连接。每个进程最多占用的连接数约为：
+    # 向量库同步/异步两个连接池 2*(pool_size+max_overflow) + 聚合查询连接池4
+    # + 使用PG全文检索时再加 2*(pool_size+max_overflow)；乘以gunicorn worker数后应低于PG的max_connections
+    "pool_size": int(ENV.get("PG_POOL_SIZE", "5")),
+    "max_overflow": int(ENV.get("PG_MAX_OVERFLOW", "5")),
+    "pool_recycle": int(ENV.get("PG_POOL_RECYCLE", "1800")),
 }
 
 # Milvus向量库配置
 MILVUS_CONFIG = {
-    "host": os.getenv("MILVUS_HOST", "localhost"),
-    "port": int(os.getenv("MILVUS_PORT", "19530")),
-    "collection": os.getenv("MILVUS_COLLECTION", "document_embeddings"),
-    "username": os.getenv("MILVUS_USERNAME", ""),
-    "password": os.getenv("MILVUS_PASSWORD", ""),
+    "host": ENV.get("MILVUS_HOST", "localhost"),
+    "port": int(ENV.get("MILVUS_PORT", "19530")),
+    "collection": ENV.get("MILVUS_COLLECTION", "document_embeddings"),
+    "username": ENV.get("MILVUS_USERNAME", ""),
+    "password": ENV.get("MILVUS_PASSWORD", ""),
 }
 
 # Elasticsearch配置
 ES_CONFIG = {
-    "host": os.getenv("ES_HOST", "localhost"),
-    "port": int(os.getenv("ES_PORT", "9200")),
-    "scheme": os.getenv("ES_SCHEME", "http"),
-    "index_name": os.getenv("ES_INDEX", "document_fulltext"),
-    "username": os.getenv("ES_USERNAME", ""),
-    "password": os.getenv("ES_PASSWORD", "")
+    "host": ENV.get("ES_HOST", "localhost"),
+    "port": int(ENV.get("ES_PORT", "9200")),
+    "scheme": ENV.get("ES_SCHEME", "http"),
+    "index_name": ENV.get("ES_INDEX", "document_fulltext"),
+    "username": ENV.get("ES_USERNAME", ""),
+    "password": ENV.get("ES_PASSWORD", ""),
+    "batch_size": int(ENV.get("ES_BULK_BATCH_SIZE", "500")),  # 写入时每个_bulk请求包含的文档数
+    "connections_per_node": int(ENV.get("ES_CONNECTIONS_PER_NODE", "32")),  # 每个节点的长连接池大小
 }
 
 # 向量存储通用配置
@@ -52,80 +68,101 @@ FULLTEXT_STORE_CONFIG = {
 
 # Milvus全文搜索特定配置
 MILVUS_FULLTEXT_CONFIG = {
-    "use_hybrid": os.getenv("MILVUS_FULLTEXT_HYBRID", "true").lower() == "true",  # 是否使用混合搜索
-    "drop_ratio_search": float(os.getenv("MILVUS_DROP_RATIO_SEARCH", "0.2")),  # 丢弃低重要性词项的比例
+    "use_hybrid": ENV.get("MILVUS_FULLTEXT_HYBRID", "true").lower() == "true",  # 是否使用混合搜索
+    "drop_ratio_search": float(ENV.get("MILVUS_DROP_RATIO_SEARCH", "0.2")),  # 丢弃低重要性词项的比例
 }
 
 # 嵌入模型配置
-EMBED_MODEL_TYPE = os.getenv("EMBED_MODEL_TYPE", "local")  # 使用阿里云嵌入模型
+EMBED_MODEL_TYPE = ENV.get("EMBED_MODEL_TYPE", "local")  # 使用阿里云嵌入模型
 
 # 本地嵌入模型配置
 LOCAL_EMBED_MODEL_CONFIG = {
-    "model_name": os.getenv("LOCAL_EMBED_MODEL", "dengcao/Qwen3-Embedding-8B:Q5_K_M")
+    "model_name": ENV.get("LOCAL_EMBED_MODEL", "dengcao/Qwen3-Embedding-8B:Q5_K_M"),
+    # 运行方式：ollama通过HTTP调用Ollama服务；hf在进程内加载HuggingFace模型批量计算，此时model_name应为HuggingFace模型名
+    "backend": ENV.get("LOCAL_EMBED_BACKEND", "ollama").lower(),
 }
 
 # 阿里云百炼嵌入模型配置
 ALIYUN_EMBED_MODEL_CONFIG = {
-    "api_key": os.getenv("ALIYUN_API_KEY", "sk-c8aff9a84da24605b8cb98ab248e646a"),
-    "model_name": os.getenv("ALIYUN_EMBED_MODEL", "text-embedding-v2"),
+    "api_key": ENV.get("ALIYUN_API_KEY", "sk-c8aff9a84da24605b8cb98ab248e646a"),
+    "model_name": ENV.get("ALIYUN_EMBED_MODEL", "text-embedding-v2"),
 }
 
+# 查询向量缓存条目数，相同查询不重复调用嵌入模型
+EMBED_CACHE_SIZE = int(ENV.get("EMBED_CACHE_SIZE", "1024"))
+
 # 重排模型配置
-RERANK_MODEL_TYPE = os.getenv("RERANK_MODEL_TYPE", "local")  # 重排模型类型：local或aliyun
+RERANK_MODEL_TYPE = ENV.get("RERANK_MODEL_TYPE", "local")  # 重排模型类型：local或aliyun
 
 # 本地重排模型配置
 LOCAL_RERANK_MODEL_CONFIG = {
-    "model_name": os.getenv("LOCAL_RERANK_MODEL", "dengcao/Qwen3-Reranker-8B:Q5_K_M"),
-    "top_n": int(os.getenv("RERANK_TOP_N", "5"))
+    "model_name": ENV.get("LOCAL_RERANK_MODEL", "dengcao/Qwen3-Reranker-8B:Q5_K_M"),
+    "top_n": int(ENV.get("RERANK_TOP_N", "5"))
 }
 
 # 阿里云重排模型配置
 ALIYUN_RERANK_MODEL_CONFIG = {
-    "api_key": os.getenv("ALIYUN_API_KEY", ""),  # 复用阿里云API Key
-    "model_name": os.getenv("ALIYUN_RERANK_MODEL", "gte-rerank"),
-    "top_n": int(os.getenv("RERANK_TOP_N", "5")),
+    "api_key": ENV.get("ALIYUN_API_KEY", ""),  # 复用阿里云API Key
+    "model_name": ENV.get("ALIYUN_RERANK_MODEL", "gte-rerank"),
+    "top_n": int(ENV.get("RERANK_TOP_N", "5")),
 }
 
 # 外部API重排配置（仅当需要使用外部API时配置）
-EXTERNAL_RERANK_API_URL = os.getenv("EXTERNAL_RERANK_API_URL", "")
-EXTERNAL_RERANK_API_KEY = os.getenv("EXTERNAL_RERANK_API_KEY", "")
+EXTERNAL_RERANK_API_URL = ENV.get("EXTERNAL_RERANK_API_URL", "")
+EXTERNAL_RERANK_API_KEY = ENV.get("EXTERNAL_RERANK_API_KEY", "")
 
 # 聊天模型配置
-CHAT_MODEL_TYPE = os.getenv("CHAT_MODEL_TYPE", "aliyun")  # 聊天模型类型：local或aliyun
+CHAT_MODEL_TYPE = ENV.get("CHAT_MODEL_TYPE", "aliyun")  # 聊天模型类型：local或aliyun
 
 # 本地聊天模型配置
 LOCAL_CHAT_MODEL_CONFIG = {
-    "model_name": os.getenv("LOCAL_CHAT_MODEL", "Qwen/Qwen2.5-7B-Chat"),
-    "temperature": float(os.getenv("CHAT_TEMPERATURE", "0.7")),
-    "max_tokens": int(os.getenv("CHAT_MAX_TOKENS", "2048")),
-    "context_window": int(os.getenv("CHAT_CONTEXT_WINDOW", "4096")),
+    "model_name": ENV.get("LOCAL_CHAT_MODEL", "Qwen/Qwen2.5-7B-Chat"),
+    "temperature": float(ENV.get("CHAT_TEMPERATURE", "0.7")),
+    "max_tokens": int(ENV.get("CHAT_MAX_TOKENS", "2048")),
+    "context_window": int(ENV.get("CHAT_CONTEXT_WINDOW", "4096")),
 }
 
 # 阿里云聊天模型配置
 ALIYUN_CHAT_MODEL_CONFIG = {
-    "api_key": os.getenv("ALIYUN_API_KEY", ""),  # 复用阿里云API Key
-    "model_name": os.getenv("ALIYUN_CHAT_MODEL", "qwen2.5-32b-instruct"),
-    "temperature": float(os.getenv("CHAT_TEMPERATURE", "0.7")),
-    "max_tokens": int(os.getenv("CHAT_MAX_TOKENS", "2048")),
+    "api_key": ENV.get("ALIYUN_API_KEY", ""),  # 复用阿里云API Key
+    "model_name": ENV.get("ALIYUN_CHAT_MODEL", "qwen2.5-32b-instruct"),
+    "temperature": float(ENV.get("CHAT_TEMPERATURE", "0.7")),
+    "max_tokens": int(ENV.get("CHAT_MAX_TOKENS", "2048")),
 }
 
 # 文档处理配置
 DOC_PROCESSING_CONFIG = {
     "chunk_size": 1024,
     "chunk_overlap": 20,
+    # 每个服务进程内文档解析、拆分进程池的大小，gunicorn多worker时总进程数为worker数乘以该值
+    "workers": int(ENV.get("DOC_PROCESS_WORKERS", "2")),
 }
 
 # 查询配置
 QUERY_CONFIG = {
     "similarity_top_k": 5,
     "response_mode": "compact",
+    # 查询前处理（敏感词过滤、LLM问题优化），问题优化每次查询额外调用一次LLM，默认关闭
+    "pre_processing_enabled": ENV.get("QUERY_PRE_PROCESSING_ENABLED", "false").lower() == "true",
+}
+
+# 语义查询缓存配置，语义相近的查询直接复用最近的检索结果
+SEMANTIC_CACHE_CONFIG = {
+    "enabled": ENV.get("SEMANTIC_CACHE_ENABLED", "false").lower() == "true",
+    "threshold": float(ENV.get("SEMANTIC_CACHE_THRESHOLD", "0.87")),  # 命中所需的最小余弦相似度
+    "max_items": int(ENV.get("SEMANTIC_CACHE_MAX_ITEMS", "1024")),
+    # 条目有效期（秒）。入库、删除后处理请求的进程会立即清空缓存，其他worker进程最多在该时间内仍可能返回旧结果
+    "ttl": float(ENV.get("SEMANTIC_CACHE_TTL", "300")),
 }
 
 # 默认检索模式: vector, text, hybrid, sparse, semantic_hybrid
-DEFAULT_SEARCH_MODE = os.getenv("DEFAULT_SEARCH_MODE", "vector")
+DEFAULT_SEARCH_MODE = ENV.get("DEFAULT_SEARCH_MODE", "vector")
 
 # 存储配置
 STORING_CONFIG = {
-    "persist_dir": os.getenv("PERSIST_DIR", "~/storage"),
-    "upload_dir": os.getenv("UPLOAD_DIR", "~/storage/uploads"),  # 文档上传存储目录
+    "persist_dir": ENV.get("PERSIST_DIR", "~/storage"),
+    "upload_dir": ENV.get("UPLOAD_DIR", "~/storage/uploads"),  # 文档上传存储目录
+    # 目录导入时用硬链接代替复制。硬链接与源文件是同一文件，源文件之后被修改或截断时，
+    # 下载到的内容和统计的大小会随之变化，与已入库的内容不再一致，因此默认关闭
+    "import_hardlink": ENV.get("IMPORT_HARDLINK", "false").lower() == "true",
 }
\ No newline at end of file
@@ -1,16 +1,13 @@
-import os
-from dotenv import load_dotenv
-
-# 加载环境变量
-load_dotenv()
+# .env已在config模块中加载，这里直接复用其环境变量快照
+from app.config.config import ENV
 
 
 # 检查必要的环境变量是否存在
 def check_required_env_vars():
     """检查必要的环境变量是否存在"""
     # 获取向量库类型
-    vector_store_type = os.getenv("VECTOR_STORE_TYPE", "pg_vector")
-    embed_model_type = os.getenv("EMBED_MODEL_TYPE", "aliyun")
+    vector_store_type = ENV.get("VECTOR_STORE_TYPE", "pg_vector")
+    embed_model_type = ENV.get("EMBED_MODEL_TYPE", "aliyun")
 
     missing_vars = []
 
@@ -21,7 +18,7 @@ def check_required_env_vars():
         ]
 
         for var in required_vars:
-            if not os.getenv(var):
+            if not ENV.get(var):
                 missing_vars.append(var)
 
     elif vector_store_type == "milvus":
@@ -30,12 +27,12 @@ def check_required_env_vars():
         ]
 
         for var in required_vars:
-            if not os.getenv(var):
+            if not ENV.get(var):
                 missing_vars.append(var)
 
     # 检查嵌入模型相关配置
     if embed_model_type == "local":
-        if not os.getenv("LOCAL_EMBED_MODEL"):
+        if not ENV.get("LOCAL_EMBED_MODEL"):
             missing_vars.append("LOCAL_EMBED_MODEL")
 
     elif embed_model_type == "aliyun":
@@ -44,7 +41,7 @@ def check_required_env_vars():
         ]
 
         for var in required_vars:
-            if not os.getenv(var):
+            if not ENV.get(var):
                 missing_vars.append(var)
 
     if missing_vars:
@@ -59,4 +56,4 @@ def get_env(key, default=None):
     """
     获取环境变量，如果不存在则返回默认值
     """
-    return os.getenv(key, default)
+    return ENV.get(key, default)
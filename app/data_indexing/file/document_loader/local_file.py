@@ -1,5 +1,6 @@
+from functools import cached_property
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List
 
 from llama_index.core import Document
 from llama_index.readers.file import DocxReader, PDFReader, HTMLTagReader, MarkdownReader, UnstructuredReader, \
@@ -12,14 +13,61 @@ class LocalFileLoader:
     """
 
     def __init__(self):
-        """初始化本地文件加载器"""
-        self.doc_reader = DocxReader()
-        self.pdf_reader = PDFReader(return_full_document=True)
-        self.html_reader = HTMLTagReader()
-        self.markdown_reader = MarkdownReader()
-        self.default_reader = UnstructuredReader()
-        self.excel_reader = PandasExcelReader()
-        self.csv_reader = CSVReader()
+        """初始化本地文件加载器，各类型的读取器在首次遇到该类型文件时才创建"""
+        # 扩展名到加载函数的映射，未列出的类型使用默认加载器
+        # 加载函数统一接收Path，路径只在load_documents中构造一次
+        doc_loader = lambda path: self.doc_reader.load_data(file=path)
+        html_loader = lambda path: self.html_reader.load_data(file=path)
+        markdown_loader = lambda path: self.markdown_reader.load_data(file=path)
+        excel_loader = lambda path: self.excel_reader.load_data(file=path)
+        self._loaders: Dict[str, Callable[[Path], List[Document]]] = {
+            'docx': doc_loader,
+            'doc': doc_loader,
+            'pdf': lambda path: self.pdf_reader.load_data(file=path),
+            'html': html_loader,
+            'htm': html_loader,
+            'markdown': markdown_loader,
+            'md': markdown_loader,
+            'txt': self._load_text,
+            'text': self._load_text,
+            'csv': lambda path: self.csv_reader.load_data(file=path),
+            'xls': excel_loader,
+            'xlsx': excel_loader,
+        }
+
+    @cached_property
+    def doc_reader(self) -> DocxReader:
+        return DocxReader()
+
+    @cached_property
+    def pdf_reader(self) -> PDFReader:
+        return PDFReader(return_full_document=True)
+
+    @cached_property
+    def html_reader(self) -> HTMLTagReader:
+        return HTMLTagReader()
+
+    @cached_property
+    def markdown_reader(self) -> MarkdownReader:
+        return MarkdownReader()
+
+    @cached_property
+    def default_reader(self) -> UnstructuredReader:
+        # UnstructuredReader依赖较重，创建耗时明显，只在遇到未知类型文件时创建
+        return UnstructuredReader()
+
+    @cached_property
+    def excel_reader(self) -> PandasExcelReader:
+        return PandasExcelReader()
+
+    @cached_property
+    def csv_reader(self) -> CSVReader:
+        return CSVReader()
+
+    @staticmethod
+    def _load_text(file_path: Path) -> List[Document]:
+        """以UTF-8一次性读取纯文本文件"""
+        return [Document(text=file_path.read_text(encoding="utf-8"))]
 
     def load_documents(self, file_path: str) -> List[Document]:
         """
@@ -31,24 +79,11 @@ class LocalFileLoader:
         Returns:
             Document对象列表
         """
-        file_type = file_path.split('.')[-1]
-        if file_type in ['docx', 'doc']:
-            return self.doc_reader.load_data(file=Path(file_path))
-        elif file_type == 'pdf':
-            return self.pdf_reader.load_data(file=Path(file_path))
-        elif file_type in ['html', 'htm']:
-            return self.html_reader.load_data(file=Path(file_path))
-        elif file_type in ['markdown', 'md']:
-            return self.markdown_reader.load_data(file=file_path)
-        elif file_type in ["txt", "text"]:
-            with open(file_path, 'r', encoding="utf-8") as f:
-                return [Document(text=f.read())]
-        elif file_type in ['csv']:
-            return self.csv_reader.load_data(file=Path(file_path))
-        elif file_type in ['xls', 'xlsx']:
-            return self.excel_reader.load_data(file=Path(file_path))
-        else:
-            return self.default_reader.load_data(file=Path(file_path))
+        path = Path(file_path)
+        loader = self._loaders.get(path.suffix[1:].lower())
+        if loader is None:
+            return self.default_reader.load_data(file=path)
+        return loader(path)
 
 # if __name__ == '__main__':
 #     filenames = os.listdir("/Users/boboo/Documents/法规文件")
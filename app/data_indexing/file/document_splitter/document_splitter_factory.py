@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from typing import Optional, List, cast
 
 from llama_index.core.node_parser import NodeParser, SentenceSplitter, TokenTextSplitter, SemanticSplitterNodeParser
@@ -7,26 +8,57 @@ from llama_index.core.node_parser.text.semantic_splitter import SentenceSplitter
 from app.data_indexing.file.document_splitter.legal_splitter import LegalSplitter
 from app.model.embedding_model import get_embedding_model
 
+# 中文断句规则，依次执行：句末标点后、六个点后、两个省略号后、句末标点加后引号后插入换行
+# 各规则按顺序替换且每次匹配会占用标点后的一个字符，连续标点的分组依赖这一顺序，不能合并为单个正则
+_SENTENCE_BREAK_RULES = (
+    (re.compile(r'([。！？?])([^”’])'), r"\1\n\2"),  # 标点后换行
+    (re.compile(r'(\.{6})([^”’])'), r"\1\n\2"),  # 省略号后换行
+    (re.compile(r'(…{2})([^”’])'), r"\1\n\2"),
+    (re.compile(r'([。！？?][”’])([^，。！？?])'), r'\1\n\2'),
+)
+
+
+def _chinese_sentence_splitter(text: str) -> List[str]:
+    """
+    根据中文标点进行分句
+
+    Args:
+        text: 待分句的文本
+
+    Returns:
+        去除首尾空白后的非空句子列表
+    """
+    for pattern, replacement in _SENTENCE_BREAK_RULES:
+        text = pattern.sub(replacement, text)
+    return [s.strip() for s in text.strip().split('\n') if s.strip()]
+
 
 class DocumentSplitterFactory:
     @staticmethod
     def create(split_strategy: str, chunk_size: Optional[int] = 500,
                chunk_overlap: Optional[int] = 50) -> NodeParser:
+        """
+        获取文档拆分器，相同参数复用同一实例（拆分器在拆分过程中不保存状态）
+
+        Args:
+            split_strategy: 拆分策略
+            chunk_size: 块大小
+            chunk_overlap: 块重叠大小
+
+        Returns:
+            文档拆分器
+        """
+        return DocumentSplitterFactory._create_cached(split_strategy, chunk_size, chunk_overlap)
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _create_cached(split_strategy: str, chunk_size: Optional[int], chunk_overlap: Optional[int]) -> NodeParser:
         if split_strategy == "sentence":
             return SentenceSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, paragraph_separator="\n\n",
                                     secondary_chunking_regex=r'[^,.;。？！；…]+[,.;。？！；…]?|[,.;。？！；…]', separator=' ')
         elif split_strategy == "token":
             return TokenTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
         elif split_strategy == "semantic":
-            def _chinese_sentence_splitter(text: str) -> List[str]:
-                # 根据中文标点进行分句
-                text = re.sub(r'([。！？?])([^”’])', r"\1\n\2", text)  # 标点后换行
-                text = re.sub(r'(\.{6})([^”’])', r"\1\n\2", text)  # 省略号后换行
-                text = re.sub(r'(…{2})([^”’])', r"\1\n\2", text)
-                text = re.sub(r'([。！？?][”’])([^，。！？?])', r'\1\n\2', text)
-                sentences = text.strip().split('\n')
-                return [s.strip() for s in sentences if s.strip()]
-
             chinese_sentence_splitter_callable: SentenceSplitterCallable = cast(SentenceSplitterCallable,
                                                                                 _chinese_sentence_splitter)
 
@@ -16,50 +16,42 @@ CHAPTER_REGEX = re.compile(rf"^\s*第([{NUM_STR}]+)章+.*")
 SECTION_REGEX = re.compile(rf"^\s*第([{NUM_STR}]+)节+.*")
 # 条正则
 ARTICLE_REGEX = re.compile(rf"^(\s|　| )*第([{NUM_STR}]+)条.*")
+# 编/章/节/条合并正则，一次匹配即可确定标题类型：group(1)为编号，group(2)为类型
+HEADING_REGEX = re.compile(rf"^\s*第([{NUM_STR}]+)([编章节条])")
+# 标题类型对应的content_type
+HEADING_CONTENT_TYPES = {"编": 1, "章": 2, "节": 3, "条": 4}
 
-# 预编译零宽字符清理正则表达式
-ZERO_WIDTH_PATTERN = re.compile(r"[\u200B\u200C\u200D\uFEFF]")
+# 整篇文本按行匹配条文的正则
+ARTICLE_LINE_REGEX = re.compile(ARTICLE_REGEX.pattern, re.MULTILINE)
+
+# 零宽字符删除表，用于str.translate
+ZERO_WIDTH_TRANSLATE = str.maketrans("", "", "\u200B\u200C\u200D\uFEFF")
 
 
 def has_article_pattern(text: str) -> bool:
-    """检查文档中是否包含条文模式"""
-    lines = [text for text in text.splitlines() if text.strip()]
-    for line in lines:
-        if ARTICLE_REGEX.search(line):
-            return True
-    return False
+    """检查文档中是否包含条文模式，多行模式下对整篇文本只搜索一次"""
+    return ARTICLE_LINE_REGEX.search(text) is not None
 
 
 def clean_and_check_blank(s: str) -> bool:
-    """优化版本：只在需要时才进行正则替换"""
-    # 首先检查是否为空，避免不必要的正则操作
-    if not s or s.strip() == "":
-        return True
+    """去除零宽字符后判断是否为空行，str.translate一次线性扫描即可完成"""
+    return not s or not s.translate(ZERO_WIDTH_TRANSLATE).strip()
 
-    # 只有当字符串包含零宽字符时才进行替换
-    if ZERO_WIDTH_PATTERN.search(s):
-        s = ZERO_WIDTH_PATTERN.sub("", s)
 
-    return s.strip() == ""
+def none_match(text: str) -> bool:
+    """判断是否不是编/章/节/条标题行，使用合并后的单个正则一次完成"""
+    return HEADING_REGEX.match(text) is None
 
 
-def none_match(text: str, patterns: Sequence[re.Pattern]) -> bool:
-    """使用预编译的正则表达式"""
-    for pattern in patterns:
-        if pattern.match(text):
-            return False
-    return True
+def split_lines(text: str) -> List[str]:
+    """按行拆分并去除首尾空白，每行只strip一次，过滤空行"""
+    return [line for line in map(str.strip, text.splitlines()) if line]
 
 
-def read_with_article_pattern(document: Document) -> List[TextNode]:
-    text = document.text
+def read_with_article_pattern(lines: List[str]) -> List[TextNode]:
     result = []
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
     part, chapter, section, article = None, None, None, None
 
-    # 预编译的模式列表
-    all_patterns = [PART_REGEX, CHAPTER_REGEX, SECTION_REGEX, ARTICLE_REGEX]
-
     i = 0
     while i < len(lines):
         line = lines[i]
@@ -69,38 +61,27 @@ def read_with_article_pattern(document: Document) -> List[TextNode]:
 
         _content_type = None
         _text = None
-        if PART_REGEX.match(line):
-            part = convert_chinese_to_number(PART_REGEX.match(line).group(1))
-            _content_type = 1
-        elif CHAPTER_REGEX.match(line):
-            chapter = convert_chinese_to_number(CHAPTER_REGEX.match(line).group(1))
-            _content_type = 2
-        elif SECTION_REGEX.match(line):
-            section = convert_chinese_to_number(SECTION_REGEX.match(line).group(1))
-            _content_type = 3
-        elif ARTICLE_REGEX.match(line):
-            _content_type = 4
-            article = convert_chinese_to_number(ARTICLE_REGEX.match(line).group(2))
-            has_more = line.endswith(":") or (i + 1 < len(lines) and none_match(lines[i + 1], all_patterns))
+        heading = HEADING_REGEX.match(line)
+        if heading:
+            _content_type = HEADING_CONTENT_TYPES[heading.group(2)]
+            number = convert_chinese_to_number(heading.group(1))
+            if _content_type == 1:
+                part = number
+            elif _content_type == 2:
+                chapter = number
+            elif _content_type == 3:
+                section = number
+            else:
+                article = number
+        if _content_type == 4:
+            has_more = line.endswith(":") or (i + 1 < len(lines) and none_match(lines[i + 1]))
             if has_more:
-                if line.startswith("　　"):
-                    line = line[2:]
-                # 说明还有具体的小条例或者更多信息
-                _line = [line]
+                # 说明还有具体的小条例或者更多信息，行已去除首尾空白，无需再处理全角缩进
                 temp_index = i + 1
-                temp_text = lines[temp_index]
-                while temp_index < len(lines) and none_match(temp_text, all_patterns):
-                    if temp_text.startswith("　　"):
-                        temp_text = temp_text[2:]
-                    _line.append('\n')
-                    _line.append(temp_text)
+                while temp_index < len(lines) and none_match(lines[temp_index]):
                     temp_index += 1
-                    if temp_index < len(lines):
-                        temp_text = lines[temp_index]
-                    else:
-                        break
+                _text = '\n'.join(lines[i:temp_index])
                 i = temp_index - 1
-                _text = ''.join(_line)
 
         if not _text:
             _text = line
@@ -115,8 +96,7 @@ def read_with_article_pattern(document: Document) -> List[TextNode]:
     return result
 
 
-def read_without_article_pattern(document: Document) -> List[TextNode]:
-    lines = [line.strip() for line in document.text.splitlines() if line.strip()]
+def read_without_article_pattern(lines: List[str]) -> List[TextNode]:
     return [TextNode(text=line) for line in lines]
 
 
@@ -126,9 +106,10 @@ class LegalSplitter(NodeParser):
         for node in _nodes:
             if isinstance(node, Document):
                 text = node.text
+                lines = split_lines(text)
                 if has_article_pattern(text):
-                    result.extend(read_with_article_pattern(node))
+                    result.extend(read_with_article_pattern(lines))
                 else:
-                    result.extend(read_without_article_pattern(node))
+                    result.extend(read_without_article_pattern(lines))
 
         return result
\ No newline at end of file
@@ -1,4 +1,6 @@
 # 中文数字转换为阿拉伯数字工具类
+from functools import lru_cache
+
 CHINESE_NUMBER = ["零", "一", "二", "三", "四", "五", "六", "七", "八", "九", "十", "百", "千", "万", "亿"]
 NUMBER = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 100, 1000, 10000, 100000000]
 CHINESE_NUM_MAP = dict(zip(CHINESE_NUMBER, NUMBER))
@@ -11,9 +13,11 @@ def is_chinese_number(s: str) -> bool:
     return all(char in CHINESE_NUM_MAP for char in s)
 
 
+@lru_cache(maxsize=2048)
 def convert_chinese_to_number(s: str) -> int | None:
     """
     将中文数字字符串（如 "三百二十一"）转换为阿拉伯数字（如 321）
+    纯函数，结果按输入缓存，法律文本中反复出现的编号只解析一次
 
     参数:
         s: 中文数字字符串
@@ -21,43 +25,25 @@ def convert_chinese_to_number(s: str) -> int | None:
     返回:
         阿拉伯数字，如果无法转换则返回 None
     """
-    if not s or not is_chinese_number(s):
+    if not s:
         return None
 
-    values = [CHINESE_NUM_MAP[char] for char in s]
-
+    # 单次遍历完成校验和取值，遇到非中文数字立即返回
+    values = []
+    for char in s:
+        value = CHINESE_NUM_MAP.get(char)
+        if value is None:
+            return None
+        values.append(value)
+
+    # 数字后接单位时相乘（如 "二百" => 2 * 100），该单位随之被消耗；
+    # 单位前面不是数字时单独累加（如开头的 "十" 或 "百千" 中的 "千"）
+    # 前一位以单位10为哨兵，后一位以数字0为哨兵，逐位累加即可，无需跳过标记
     result = 0
-    index = 0
-    skip_next = False
-
-    while index < len(values):
-        current = values[index]
-
-        if skip_next:
-            skip_next = False
-            index += 1
-            continue
-
-        # 当前为单位数（十百千等）
-        if current >= 10:
-            if index == 0:
-                result += current
-            else:
-                prev = values[index - 1]
-                if prev < 10:
-                    # 如：二百 => 2 * 100
-                    result += prev * current
-                else:
-                    # 连续单位：百千 等，取当前单位（如 "百亿" 视作 100000000）
-                    result += current
-        else:
-            # 当前是数字，判断后面是否是单位
-            if index + 1 < len(values) and values[index + 1] >= 10:
-                result += current * values[index + 1]
-                skip_next = True
-            else:
-                result += current
-
-        index += 1
+    for prev, current, following in zip([10] + values, values, values[1:] + [0]):
+        if current < 10:
+            result += current * following if following >= 10 else current
+        elif prev >= 10:
+            result += current
 
     return result
\ No newline at end of file
@@ -0,0 +1,73 @@
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, Tuple
+
+from llama_index.core.vector_stores import MetadataFilters, ExactMatchFilter, FilterOperator
+
+# 空过滤条件共用的对象
+EMPTY_METADATA_FILTERS = MetadataFilters(filters=[])
+
+
+def is_contains_pattern(value: Any) -> bool:
+    """判断过滤值是否为%关键词%形式的包含匹配，首尾字符直接比较，无需两次前后缀扫描"""
+    return isinstance(value, str) and value[:1] == "%" == value[-1:]
+
+
+def convert_filter_dict_to_metadata_filters(filter_dict: Dict[str, Any]) -> MetadataFilters:
+    """
+    将字典类型的过滤条件转换为MetadataFilters对象，相同的过滤条件复用缓存的转换结果
+    
+    Args:
+        filter_dict: 字典类型的过滤条件，例如：
+               - 精确匹配: {"doc_id": "doc1"}
+               - 列表匹配: {"doc_id": ["doc1", "doc2"]}
+               - 包含匹配: {"content": "%关键词%"}
+               - 空值匹配: {"tag": None}
+        
+    Returns:
+        MetadataFilters对象，filters列表为独立副本，可以增删条件；其中的过滤条件对象与缓存共享，不应修改
+    """
+    if not filter_dict:
+        return _copy_metadata_filters(EMPTY_METADATA_FILTERS)
+
+    # 列表转为元组并标记，得到可哈希的键；值本身不可哈希时不走缓存
+    # True == 1 == 1.0 的哈希相同，键中带上值的类型，避免不同类型的值共用缓存结果
+    # 按字段名排序，键的插入顺序不同但条件相同的字典共用同一缓存条目
+    frozen = tuple(
+        (key, tuple(map(type, value)), tuple(value)) if isinstance(value, list) else (key, type(value), value)
+        for key, value in sorted(filter_dict.items(), key=itemgetter(0))
+    )
+    try:
+        metadata_filters = _build_metadata_filters(frozen)
+    except TypeError:
+        metadata_filters = _build_metadata_filters.__wrapped__(frozen)
+    return _copy_metadata_filters(metadata_filters)
+
+
+def _copy_metadata_filters(metadata_filters: MetadataFilters) -> MetadataFilters:
+    """浅拷贝MetadataFilters，调用方对filters列表的修改不会影响缓存"""
+    return metadata_filters.model_copy(update={"filters": list(metadata_filters.filters)})
+
+
+@lru_cache(maxsize=1024)
+def _build_metadata_filters(frozen: Tuple[Tuple[str, Any, Any], ...]) -> MetadataFilters:
+    filters = []
+
+    for key, value_type, value in frozen:
+        # 根据值类型选择合适的操作符，列表的类型标记为元素类型的元组
+        if isinstance(value_type, tuple):
+            # 列表类型使用IN操作符
+            filters.append(ExactMatchFilter(key=key, value=list(value), operator=FilterOperator.IN))
+        elif is_contains_pattern(value):
+            # 包含模式使用CONTAINS操作符
+            # 移除前后的%通配符
+            clean_value = value[1:-1]
+            filters.append(ExactMatchFilter(key=key, value=clean_value, operator=FilterOperator.CONTAINS))
+        elif value is None:
+            # 空值使用IS_EMPTY操作符
+            filters.append(ExactMatchFilter(key=key, value=None, operator=FilterOperator.IS_EMPTY))
+        else:
+            # 默认使用相等操作符
+            filters.append(ExactMatchFilter(key=key, value=value, operator=FilterOperator.EQ))
+
+    return MetadataFilters(filters=filters)
@@ -1,8 +1,11 @@
 from abc import ABC
 from typing import List, Dict, Optional, Any
 
-from llama_index.core.schema import BaseNode
-from llama_index.core.vector_stores import MetadataFilters, ExactMatchFilter, FilterOperator
+from llama_index.core.schema import BaseNode, NodeWithScore
+from llama_index.core.vector_stores import MetadataFilters
+from llama_index.core.vector_stores.types import VectorStoreQueryResult
+
+from app.data_source.filters import convert_filter_dict_to_metadata_filters
 
 
 class BaseFullTextStore(ABC):
@@ -28,26 +31,40 @@ class BaseFullTextStore(ABC):
         Returns:
             MetadataFilters对象
         """
-        filters = []
+        return convert_filter_dict_to_metadata_filters(filter_dict)
+
+    @staticmethod
+    def _to_nodes_with_score(query_results: VectorStoreQueryResult) -> List[NodeWithScore]:
+        """
+        将llama-index查询结果转换为NodeWithScore列表，与向量存储的返回类型一致
         
-        for key, value in filter_dict.items():
-            # 根据值类型选择合适的操作符
-            if isinstance(value, list):
-                # 列表类型使用IN操作符
-                filters.append(ExactMatchFilter(key=key, value=value, operator=FilterOperator.IN))
-            elif isinstance(value, str) and value.startswith("%") and value.endswith("%"):
-                # 包含模式使用CONTAINS操作符
-                # 移除前后的%通配符
-                clean_value = value[1:-1]
-                filters.append(ExactMatchFilter(key=key, value=clean_value, operator=FilterOperator.CONTAINS))
-            elif value is None:
-                # 空值使用IS_EMPTY操作符
-                filters.append(ExactMatchFilter(key=key, value=None, operator=FilterOperator.IS_EMPTY))
-            else:
-                # 默认使用相等操作符
-                filters.append(ExactMatchFilter(key=key, value=value, operator=FilterOperator.EQ))
+        Args:
+            query_results: llama-index的查询结果
+            
+        Returns:
+            包含节点和分数的NodeWithScore对象列表
+        """
+        return [
+            NodeWithScore(node=node, score=score)
+            for node, score in zip(query_results.nodes, query_results.similarities)
+        ]
+
+    @staticmethod
+    def to_dicts(results: List[NodeWithScore]) -> List[Dict[str, Any]]:
+        """
+        将搜索结果转换为字典列表，供需要纯字典结构的调用方使用
         
-        return MetadataFilters(filters=filters)
+        Args:
+            results: NodeWithScore对象列表
+            
+        Returns:
+            字典列表，每个结果包含id、text、metadata和score
+        """
+        return [
+            {"id": result.node.node_id, "text": result.node.get_content(), "metadata": result.node.metadata,
+             "score": result.score}
+            for result in results
+        ]
     
     def add_data(
         self, 
@@ -139,7 +156,7 @@ class BaseFullTextStore(ABC):
         top_k: int = 5, 
         filters: Optional[Dict[str, Any]] = None,
         **kwargs
-    ) -> List[Dict[str, Any]]:
+    ) -> List[NodeWithScore]:
         """
         通过文本进行全文搜索
         
@@ -153,6 +170,6 @@ class BaseFullTextStore(ABC):
                    - 空值匹配: {"tag": None}
             
         Returns:
-            搜索结果列表，每个结果包含id、text、metadata和score
+            包含节点和分数的NodeWithScore对象列表
         """
         raise NotImplementedError("子类必须实现search_by_text方法") 
\ No newline at end of file
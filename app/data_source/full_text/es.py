@@ -1,12 +1,60 @@
-from typing import List, Dict, Optional, Any
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Tuple
 
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+from elasticsearch.serializer import OrjsonSerializer
 from elasticsearch.helpers.vectorstore import AsyncBM25Strategy
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.vector_stores.types import VectorStoreQuery, VectorStoreQueryMode
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
 from llama_index.vector_stores.elasticsearch import ElasticsearchStore
 
 from app.config.config import ES_CONFIG
+from app.data_source.filters import is_contains_pattern
 from app.data_source.full_text.base import BaseFullTextStore
 
 
+# llama-index ElasticsearchStore的文本字段和元数据字段
+TEXT_FIELD = "content"
+METADATA_FIELD = "metadata"
+# 搜索结果只返回需要的字段，并跳过命中总数统计，减少响应体积和ES端开销
+SEARCH_OPTIONS = {"_source": [TEXT_FIELD, METADATA_FIELD], "track_total_hits": False}
+
+
+def _apply_search_options(body: Dict[str, Any], _query: Optional[VectorStoreQuery] = None) -> Dict[str, Any]:
+    """llama-index custom_query回调，在生成的查询体上补充SEARCH_OPTIONS"""
+    return {**body, **SEARCH_OPTIONS}
+
+
+def _client_options(url: str, basic_auth: Optional[Tuple[str, str]], connections_per_node: int) -> Dict[str, Any]:
+    """
+    ES客户端参数：长连接池、请求压缩、超时重试，JSON序列化使用orjson
+    
+    Args:
+        url: ES地址
+        basic_auth: 用户名和密码，不需要认证时为None
+        connections_per_node: 每个节点的连接池大小
+        
+    Returns:
+        客户端构造参数
+    """
+    return {
+        "hosts": url,
+        "basic_auth": basic_auth,
+        "serializer": OrjsonSerializer(),
+        "connections_per_node": connections_per_node,
+        "http_compress": True,
+        "retry_on_timeout": True,
+        "max_retries": 3,
+    }
+
+
+@lru_cache(maxsize=None)
+def _get_shared_client(url: str, basic_auth: Optional[Tuple[str, str]], connections_per_node: int) -> Elasticsearch:
+    """同一地址和账号的同步客户端在进程内共享，多个实例复用同一个连接池"""
+    return Elasticsearch(**_client_options(url, basic_auth, connections_per_node))
+
+
 class ESFullTextStore(BaseFullTextStore):
     """
     Elasticsearch 全文搜索实现，使用llama-index提供的集成
@@ -24,15 +72,21 @@ class ESFullTextStore(BaseFullTextStore):
         # 合并配置
         self.config = {**ES_CONFIG, **kwargs}
         self.index_name = kwargs.get("index_name", self.config.get("index_name"))
+        self.es_url = f"{self.config.get('scheme', 'http')}://{self.config['host']}:{self.config['port']}"
+        username = self.config.get("username")
+        self._basic_auth = (username, self.config.get("password")) if username else None
+        self._connections_per_node = self.config.get("connections_per_node", 32)
 
         # 初始化LlamaIndex的ElasticsearchStore
         try:
-            # 初始化ElasticsearchStore
+            # 初始化ElasticsearchStore，使用自建的客户端以便替换JSON序列化
             self.llama_store = ElasticsearchStore(
                 index_name=self.index_name,
-                es_url=f"{self.config.get('scheme', 'http')}://{self.config['host']}:{self.config['port']}",
-                es_user=self.config.get("username"),
-                es_password=self.config.get("password"),
+                # 异步客户端绑定llama-index内部的事件循环，每个实例单独创建
+                es_client=AsyncElasticsearch(**_client_options(self.es_url, self._basic_auth,
+                                                               self._connections_per_node)),
+                # 写入时每个_bulk请求的文档数，减少批量入库的请求往返
+                batch_size=self.config.get("batch_size", 500),
                 retrieval_strategy=AsyncBM25Strategy()
             )
 
@@ -42,13 +96,91 @@ class ESFullTextStore(BaseFullTextStore):
             print(f"初始化ES全文搜索引擎失败: {str(e)}")
             raise
 
+    def _get_es_client(self) -> Elasticsearch:
+        """获取同步ES客户端，用于llama-index未提供的批量接口"""
+        return _get_shared_client(self.es_url, self._basic_auth, self._connections_per_node)
+
+    @staticmethod
+    def _build_es_filter(filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将字典类型的过滤条件转换为ES过滤子句，语义与_convert_filter_dict_to_metadata_filters一致
+        
+        Args:
+            filters: 过滤条件
+            
+        Returns:
+            ES过滤子句列表
+        """
+        es_filter = []
+        for key, value in (filters or {}).items():
+            field = f"{METADATA_FIELD}.{key}"
+            if isinstance(value, list):
+                es_filter.append({"terms": {f"{field}.keyword": value}})
+            elif is_contains_pattern(value):
+                es_filter.append({"wildcard": {f"{field}.keyword": {"value": f"*{value[1:-1]}*"}}})
+            elif value is None:
+                es_filter.append({"bool": {"must_not": {"exists": {"field": field}}}})
+            else:
+                es_filter.append({"term": {f"{field}.keyword": value}})
+        return es_filter
+
+    @staticmethod
+    def _to_node_with_score(hit: Dict[str, Any]) -> NodeWithScore:
+        """将ES命中结果转换为与search_by_text一致的NodeWithScore"""
+        source = hit["_source"]
+        node = metadata_dict_to_node(source[METADATA_FIELD], text=source[TEXT_FIELD])
+        return NodeWithScore(node=node, score=hit["_score"])
+
+    def batch_search_by_text(
+        self,
+        texts: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[NodeWithScore]]:
+        """
+        批量全文搜索，所有查询通过一次_msearch请求发送
+        
+        Args:
+            texts: 查询文本列表
+            top_k: 每个查询返回的结果数量
+            filters: 过滤条件，所有查询共用
+            
+        Returns:
+            与texts一一对应的NodeWithScore列表，单个查询失败时对应结果为空列表
+        """
+        if not self.initialized or not self.llama_store:
+            raise ValueError("全文搜索引擎未初始化")
+        if not texts:
+            return []
+
+        es_filter = self._build_es_filter(filters)
+        searches = []
+        for text in texts:
+            searches.append({})
+            searches.append({
+                "query": {"bool": {"must": [{"match": {TEXT_FIELD: {"query": text}}}], "filter": es_filter}},
+                "size": top_k,
+                **SEARCH_OPTIONS
+            })
+
+        responses = self._get_es_client().msearch(index=self.index_name, searches=searches)["responses"]
+
+        results = []
+        for text, response in zip(texts, responses):
+            if "error" in response:
+                print(f"批量全文搜索失败: {text[:50]}, {response['error']}")
+                results.append([])
+                continue
+            results.append([self._to_node_with_score(hit) for hit in response["hits"]["hits"]])
+        return results
+
     def search_by_text(
         self, 
         text: str, 
         top_k: int = 5, 
         filters: Optional[Dict[str, Any]] = None,
         **kwargs
-    ) -> List[Dict[str, Any]]:
+    ) -> List[NodeWithScore]:
         """
         通过文本进行全文搜索
         
@@ -58,32 +190,25 @@ class ESFullTextStore(BaseFullTextStore):
             filters: 过滤条件，根据元数据过滤
             
         Returns:
-            搜索结果列表，每个结果包含id、text、metadata和score
+            包含节点和分数的NodeWithScore对象列表
         """
         if not self.initialized or not self.llama_store:
             raise ValueError("全文搜索引擎未初始化")
             
-        # 转换过滤条件（如果有）
-        metadata_filters = None
-        if filters:
-            metadata_filters = self._convert_filter_dict_to_metadata_filters(filters)
+        # 过滤条件直接转换为ES过滤子句，放在bool.filter中，不参与打分且可利用ES的过滤缓存
+        es_filter = self._build_es_filter(filters) if filters else None
             
         # 使用ES进行全文搜索
         query_results = self.llama_store.query(
-            query_str=text,
-            similarity_top_k=top_k,
-            filters=metadata_filters,
+            VectorStoreQuery(
+                query_str=text,
+                similarity_top_k=top_k,
+                mode=VectorStoreQueryMode.TEXT_SEARCH
+            ),
+            es_filter=es_filter,
+            custom_query=kwargs.pop("custom_query", _apply_search_options),
             **kwargs
         )
         
         # 格式化结果
-        formatted_results = []
-        for node, score in zip(query_results.nodes, query_results.similarities):
-            formatted_results.append({
-                "id": node.node_id,
-                "text": node.get_content(),
-                "metadata": node.metadata,
-                "score": score
-            })
-        
-        return formatted_results 
\ No newline at end of file
+        return self._to_nodes_with_score(query_results) 
\ No newline at end of file
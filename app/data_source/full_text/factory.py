@@ -1,4 +1,3 @@
-from app.data_source.full_text.es import ESFullTextStore
 from app.config.config import FULLTEXT_STORE_TYPE
 
 class FullTextStoreFactory:
@@ -27,6 +26,8 @@ class FullTextStoreFactory:
             
         try:
             if fulltext_store_type == "es":
+                # 按需导入ES实现
+                from app.data_source.full_text.es import ESFullTextStore
                 return ESFullTextStore(**kwargs)
             elif fulltext_store_type == "pg_vector":
                 # 按需导入PG实现
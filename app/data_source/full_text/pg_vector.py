@@ -1,10 +1,12 @@
 from typing import List, Dict, Optional, Any
 
 from llama_index.core import VectorStoreIndex
+from llama_index.core.schema import NodeWithScore
 from llama_index.vector_stores.postgres import PGVectorStore
 
 from app.config.config import PG_CONFIG
 from app.data_source.full_text.base import BaseFullTextStore
+from app.model.embedding_model import get_cached_query_embedding
 
 
 class PGFullTextStore(BaseFullTextStore):
@@ -35,7 +37,12 @@ class PGFullTextStore(BaseFullTextStore):
                 port=self.config["port"],
                 user=self.config["user"],
                 table_name=f"{self.table_name}_fulltext",
-
+                create_engine_kwargs={
+                    "pool_size": self.config["pool_size"],
+                    "max_overflow": self.config["max_overflow"],
+                    "pool_recycle": self.config["pool_recycle"],
+                    "pool_pre_ping": True,
+                },
             )
 
             self.index = VectorStoreIndex.from_vector_store(self.llama_store)
@@ -53,7 +60,7 @@ class PGFullTextStore(BaseFullTextStore):
         filters: Optional[Dict[str, Any]] = None,
         use_hybrid_search: bool = True,
         **kwargs
-    ) -> List[Dict[str, Any]]:
+    ) -> List[NodeWithScore]:
         """
         通过文本进行全文搜索
         
@@ -64,7 +71,7 @@ class PGFullTextStore(BaseFullTextStore):
             use_hybrid_search: 是否使用混合搜索(结合向量搜索和全文搜索)
             
         Returns:
-            搜索结果列表，每个结果包含id、text、metadata和score
+            包含节点和分数的NodeWithScore对象列表
         """
         if not self.initialized or not self.llama_store:
             raise ValueError("全文搜索引擎未初始化")
@@ -85,23 +92,14 @@ class PGFullTextStore(BaseFullTextStore):
                 )
                 
                 # 格式化结果
-                formatted_results = []
-                for node, score in zip(query_results.nodes, query_results.similarities):
-                    formatted_results.append({
-                        "id": node.node_id,
-                        "text": node.get_content(),
-                        "metadata": node.metadata,
-                        "score": score
-                    })
-                
-                return formatted_results
+                return self._to_nodes_with_score(query_results)
             except Exception as e:
                 print(f"混合搜索失败，回退到向量搜索: {e}")
                 # 如果混合搜索失败，回退到向量搜索
                 pass
         
-        # 获取文本嵌入进行向量搜索
-        embedding = self.embed_model.get_text_embedding(text)
+        # 获取查询向量进行向量搜索，相同查询复用缓存的向量
+        embedding = get_cached_query_embedding(text)
             
         # 使用PG进行向量相似度搜索
         from llama_index.core.vector_stores import VectorStoreQuery
@@ -114,13 +112,4 @@ class PGFullTextStore(BaseFullTextStore):
         query_results = self.llama_store.query(query, **kwargs)
         
         # 格式化结果
-        formatted_results = []
-        for node, score in zip(query_results.nodes, query_results.similarities):
-            formatted_results.append({
-                "id": node.node_id,
-                "text": node.get_content(),
-                "metadata": node.metadata,
-                "score": score
-            })
-        
-        return formatted_results 
\ No newline at end of file
+        return self._to_nodes_with_score(query_results) 
\ No newline at end of file
@@ -1,11 +1,29 @@
+import asyncio
 from abc import ABC
-from typing import List, Dict, Optional, Any
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Optional, Any, Tuple
 
 from llama_index.core import VectorStoreIndex
-from llama_index.core.schema import BaseNode, NodeWithScore
-from llama_index.core.vector_stores import MetadataFilters, ExactMatchFilter, FilterOperator
+from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.schema import BaseNode, NodeWithScore, QueryBundle
+from llama_index.core.vector_stores import MetadataFilters
 from llama_index.core.vector_stores.types import VectorStoreQueryMode
 
+from app.data_source.filters import convert_filter_dict_to_metadata_filters
+from app.model.embedding_model import get_cached_query_embedding
+
+# 批量检索的最大并发数
+SEARCH_WORKERS = 8
+
+# 需要查询向量的检索模式
+EMBEDDING_QUERY_MODES = {
+    VectorStoreQueryMode.DEFAULT,
+    VectorStoreQueryMode.HYBRID,
+    VectorStoreQueryMode.SEMANTIC_HYBRID
+}
+
 
 class BaseVectorStore(ABC):
     """
@@ -17,6 +35,7 @@ class BaseVectorStore(ABC):
         """初始化基类属性"""
         # 子类需要初始化这些属性
         self.vector_store_index: Optional[VectorStoreIndex] = None  # llama-index的向量索引
+        self.embed_model: Optional[BaseEmbedding] = None  # 嵌入模型
         self.initialized: bool = False  # 初始化状态标志
 
     @staticmethod
@@ -30,26 +49,7 @@ class BaseVectorStore(ABC):
         Returns:
             MetadataFilters对象
         """
-        filters = []
-
-        for key, value in filter_dict.items():
-            # 根据值类型选择合适的操作符
-            if isinstance(value, list):
-                # 列表类型使用IN操作符
-                filters.append(ExactMatchFilter(key=key, value=value, operator=FilterOperator.IN))
-            elif isinstance(value, str) and value.startswith("%") and value.endswith("%"):
-                # 包含模式使用CONTAINS操作符
-                # 移除前后的%通配符
-                clean_value = value[1:-1]
-                filters.append(ExactMatchFilter(key=key, value=clean_value, operator=FilterOperator.CONTAINS))
-            elif value is None:
-                # 空值使用IS_EMPTY操作符
-                filters.append(ExactMatchFilter(key=key, value=None, operator=FilterOperator.IS_EMPTY))
-            else:
-                # 默认使用相等操作符
-                filters.append(ExactMatchFilter(key=key, value=value, operator=FilterOperator.EQ))
-
-        return MetadataFilters(filters=filters)
+        return convert_filter_dict_to_metadata_filters(filter_dict)
 
     def add_data(
             self,
@@ -70,6 +70,19 @@ class BaseVectorStore(ABC):
 
         self.vector_store_index.insert_nodes(nodes, **kwargs)
 
+    async def add_data_async(
+            self,
+            nodes: List[BaseNode],
+            **kwargs
+    ) -> None:
+        """
+        异步添加数据到向量存储，在线程中执行同步写入，便于多个批次并发提交
+        
+        Args:
+            nodes: llama-index的Node对象列表
+        """
+        await asyncio.to_thread(self.add_data, nodes, **kwargs)
+
     def get_data(
             self,
             node_ids: Optional[List[str]] = None,
@@ -103,6 +116,48 @@ class BaseVectorStore(ABC):
             print(f"获取节点失败: {e}")
             return []
 
+    def list_files(
+            self,
+            offset: int = 0,
+            limit: int = 20,
+            filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        按file_id分组分页查询文件列表
+        默认实现取出全部匹配节点后在内存中分组，支持聚合查询的子类应覆盖此方法
+        
+        Args:
+            offset: 跳过的文件数量
+            limit: 返回的文件数量
+            filters: 过滤条件，格式同get_data
+            
+        Returns:
+            (当前页的文件信息列表, 文件总数)
+        """
+        nodes = self.get_data(filters=filters if filters else None)
+
+        metadatas = [node.metadata for node in nodes if node.metadata and 'file_id' in node.metadata]
+        file_ids = [metadata['file_id'] for metadata in metadatas]
+        # Counter按首次出现顺序保存各文件的节点数；倒序构建字典使每个文件保留首个节点的元数据
+        node_counts = Counter(file_ids)
+        first_metadata = dict(zip(reversed(file_ids), reversed(metadatas)))
+
+        # 只为当前页的文件构建结果
+        files = []
+        for file_id, node_count in islice(node_counts.items(), offset, offset + limit):
+            metadata = first_metadata[file_id]
+            files.append({
+                "file_id": file_id,
+                "file_name": metadata.get('file_name', 'unknown'),
+                "file_path": metadata.get('file_path', ''),
+                "upload_time": metadata.get('upload_time', ''),
+                "split_strategy": metadata.get('split_strategy', ''),
+                "chunk_size": metadata.get('chunk_size', 0),
+                "chunk_overlap": metadata.get('chunk_overlap', 0),
+                "node_count": node_count
+            })
+        return files, len(node_counts)
+
     def delete_data(
             self,
             node_ids: Optional[List[str]] = None,
@@ -189,4 +244,49 @@ class BaseVectorStore(ABC):
                                                          alpha=kwargs.get("alpha",
                                                                           0.5) if query_mode == VectorStoreQueryMode.HYBRID else None,
                                                          similarity_top_k=top_k)
-        return retriever.retrieve(text)
+        return retriever.retrieve(self._build_query_bundle(text, query_mode))
+
+    def search_by_texts(
+            self,
+            texts: List[str],
+            top_k: int = 5,
+            filters: Optional[Dict[str, Any]] = None,
+            mode: str = "vector",
+            **kwargs
+    ) -> List[List[NodeWithScore]]:
+        """
+        批量文本搜索，多个查询的向量计算和检索并发执行
+        
+        Args:
+            texts: 查询文本列表
+            top_k: 每个查询返回的结果数量
+            filters: 过滤条件，所有查询共用
+            mode: 检索模式，同search_by_text
+            **kwargs: 额外参数，同search_by_text
+            
+        Returns:
+            与texts一一对应的NodeWithScore列表
+        """
+        if len(texts) <= 1:
+            return [self.search_by_text(text, top_k=top_k, filters=filters, mode=mode, **kwargs) for text in texts]
+
+        with ThreadPoolExecutor(max_workers=min(len(texts), SEARCH_WORKERS)) as executor:
+            return list(executor.map(
+                lambda text: self.search_by_text(text, top_k=top_k, filters=filters, mode=mode, **kwargs),
+                texts
+            ))
+
+    def _build_query_bundle(self, text: str, query_mode: VectorStoreQueryMode) -> QueryBundle:
+        """
+        构建查询，需要向量的模式预先填入缓存的查询向量，检索器不再重复调用嵌入模型
+        
+        Args:
+            text: 查询文本
+            query_mode: 检索模式
+            
+        Returns:
+            QueryBundle对象
+        """
+        if self.embed_model is None or query_mode not in EMBEDDING_QUERY_MODES:
+            return QueryBundle(query_str=text)
+        return QueryBundle(query_str=text, embedding=get_cached_query_embedding(text, self.embed_model))
@@ -1,6 +1,5 @@
 from app.config.config import VECTOR_STORE_TYPE
 from app.data_source.vector.base import BaseVectorStore
-from app.data_source.vector.pg_vector import PGVectorStore
 
 
 class VectorStoreFactory:
@@ -28,6 +27,8 @@ class VectorStoreFactory:
 
         try:
             if vector_store_type == "pg_vector":
+                # 按需导入PG实现
+                from app.data_source.vector.pg_vector import PGVectorStore
                 return PGVectorStore(**kwargs)
             elif vector_store_type == "milvus":
                 # 按需导入Milvus实现
@@ -28,7 +28,7 @@ class MilvusVectorStore(BaseVectorStore):
         self.embed_dim = kwargs.get("embed_dim", VECTOR_STORE_CONFIG["embed_dim"])
 
         # 设置嵌入模型
-        self.embeddings = embed_model or kwargs.get("embed_model") or get_embedding_model()
+        self.embed_model = embed_model or kwargs.get("embed_model") or get_embedding_model()
 
         # 构建URI，如果有用户名和密码则嵌入到URI中
         host = self.config["host"]
@@ -47,7 +47,7 @@ class MilvusVectorStore(BaseVectorStore):
             collection_name=self.config["collection"],
             dim=self.embed_dim,
             overwrite=self.config.get("overwrite", False),
-            embed_model=self.embeddings,
+            embed_model=self.embed_model,
             doc_id_field="doc_id",
 
         )
@@ -1,20 +1,49 @@
+import csv
+import io
+import json
 import os
-from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
 
+import orjson
 from fsspec.implementations.local import LocalFileSystem
 from llama_index.core import VectorStoreIndex, StorageContext
 from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.indices.utils import embed_nodes
 from llama_index.core.retrievers import QueryFusionRetriever
 from llama_index.core.retrievers.fusion_retriever import FUSION_MODES
-from llama_index.core.schema import NodeWithScore
+from llama_index.core.schema import BaseNode, MetadataMode, NodeWithScore, QueryBundle
 from llama_index.core.storage.docstore.types import DEFAULT_PERSIST_FNAME
 from llama_index.core.vector_stores.types import VectorStoreQueryMode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
 from llama_index.vector_stores.postgres import PGVectorStore as LlamaIndexPGVectorStore
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL, Engine
 
 from app.config.config import PG_CONFIG, VECTOR_STORE_CONFIG, STORING_CONFIG
-from app.data_source.vector.base import BaseVectorStore
+from app.data_source.filters import is_contains_pattern
+from app.data_source.vector.base import BaseVectorStore, SEARCH_WORKERS
 from app.model.chat_model import get_chat_model
 from app.model.embedding_model import get_embedding_model
+from app.utils.file_lock import file_lock
+from app.utils.ttl_cache import TTLCache
+
+# COPY写入的列，与llama-index数据表的布局对应，其余列由数据库生成或有默认值
+COPY_COLUMNS = ("node_id", "text", "metadata_", "embedding")
+
+# 混合检索中稠密/稀疏子检索共用的线程池，psycopg2等待数据库时释放GIL，两条SQL可同时执行
+_HYBRID_EXECUTOR = ThreadPoolExecutor(max_workers=SEARCH_WORKERS * 2, thread_name_prefix="pg-hybrid")
+
+
+class _ParallelFusionRetriever(QueryFusionRetriever):
+    """
+    子检索器并发执行的融合检索器，混合检索耗时由两次检索之和降为其中较慢的一次
+    """
+
+    def _run_sync_queries(self, queries: List[QueryBundle]) -> Dict[Tuple[str, int], List[NodeWithScore]]:
+        tasks = [(query, i, retriever) for query in queries for i, retriever in enumerate(self._retrievers)]
+        futures = [_HYBRID_EXECUTOR.submit(retriever.retrieve, query) for query, _, retriever in tasks]
+        return {(query.query_str, i): future.result() for (query, i, _), future in zip(tasks, futures)}
 
 
 class PGVectorStore(BaseVectorStore):
@@ -51,36 +80,295 @@ class PGVectorStore(BaseVectorStore):
             embed_dim=self.embed_dim,
             text_search_config="english",
             hybrid_search=True,
+            use_halfvec=self.db_config["use_halfvec"],
+            hnsw_kwargs=self._hnsw_kwargs(),
+            create_engine_kwargs=self._engine_kwargs(),
         )
 
         persist_dir_ = STORING_CONFIG["persist_dir"]
 
         doc_store_path = os.path.join(persist_dir_, DEFAULT_PERSIST_FNAME)
 
-        if os.path.exists(doc_store_path):
-            self.storage_context = StorageContext.from_defaults(vector_store=self.llama_vector_store,
-                                                                persist_dir=persist_dir_, fs=LocalFileSystem())
-
-            self.vector_store_index = VectorStoreIndex(nodes=[], storage_context=self.storage_context,
-                                                       embed_model=self.embed_model,
-                                                       show_progress=True)
-
-        else:
+        # 多个worker同时启动时，只允许一个进程首次保存，其余进程等待后直接读取，避免并发写同一组文件
+        with file_lock(os.path.join(persist_dir_, ".persist.lock")):
+            persisted = os.path.exists(doc_store_path)
             self.storage_context = StorageContext.from_defaults(vector_store=self.llama_vector_store,
+                                                                persist_dir=persist_dir_ if persisted else None,
                                                                 fs=LocalFileSystem())
 
             self.vector_store_index = VectorStoreIndex(nodes=[], storage_context=self.storage_context,
                                                        embed_model=self.embed_model,
                                                        show_progress=True)
 
-            # 首次创建后保存
-            self.storage_context.persist(persist_dir_)
+            if not persisted:
+                # 首次创建后保存
+                self.storage_context.persist(persist_dir_)
 
         self.llm = get_chat_model().llm
 
+        # 混合检索的融合检索器按(top_k, 过滤条件)复用，避免每次查询重新构建
+        self._hybrid_retrievers = TTLCache(maxsize=256, ttl=3600.0)
+
+        # 文件列表等聚合查询使用的数据库连接，首次使用时创建
+        self._sql_engine: Optional[Engine] = None
+
+        # 按file_id查询的表达式索引，数据表由llama-index在首次写入时创建，建表后再补建索引
+        self._file_id_indexed = False
+        self._ensure_file_id_index()
+
+        # 数据表存在且列布局校验通过后，写入改用COPY
+        self._copy_ready = False
+
         # 使集合/表格可用
         self.initialized = True
 
+    def _engine_kwargs(self) -> Dict[str, Any]:
+        """
+        数据库连接池参数，检索复用已建立的连接，避免每次查询重新建连
+
+        Returns:
+            传给create_engine的连接池参数
+        """
+        return {
+            "pool_size": self.db_config["pool_size"],
+            "max_overflow": self.db_config["max_overflow"],
+            "pool_recycle": self.db_config["pool_recycle"],
+            "pool_pre_ping": True,
+        }
+
+    def _hnsw_kwargs(self) -> Optional[Dict[str, Any]]:
+        """
+        HNSW索引参数，向量已归一化，余弦距离与内积排序一致
+
+        Returns:
+            传给llama-index的hnsw_kwargs，未启用时返回None
+        """
+        ef_search = self.db_config["hnsw_ef_search"]
+        if not ef_search:
+            return None
+        return {
+            "hnsw_m": 16,
+            "hnsw_ef_construction": 64,
+            "hnsw_ef_search": ef_search,
+            "hnsw_dist_method": "halfvec_cosine_ops" if self.db_config["use_halfvec"] else "vector_cosine_ops",
+        }
+
+    @property
+    def _data_table(self) -> str:
+        """llama-index实际使用的数据表名（含schema）"""
+        return f'"{self.llama_vector_store.schema_name}"."data_{self.llama_vector_store.table_name}"'
+
+    def _get_sql_engine(self) -> Engine:
+        """获取执行聚合查询、COPY写入的数据库连接，使用固定的小连接池，不随检索连接池放大"""
+        if self._sql_engine is None:
+            self._sql_engine = create_engine(URL.create(
+                "postgresql+psycopg2",
+                username=self.db_config["user"],
+                password=self.db_config["password"],
+                host=self.db_config["host"],
+                port=self.db_config["port"],
+                database=self.db_config["database"],
+            ), pool_size=2, max_overflow=2, pool_recycle=self.db_config["pool_recycle"], pool_pre_ping=True)
+        return self._sql_engine
+
+    def _ensure_file_id_index(self) -> None:
+        """
+        为metadata_中的file_id创建表达式索引，使按文件查询、删除、分组不再全表扫描
+        数据表尚未创建或创建失败时跳过，下次写入后重试
+        """
+        if self._file_id_indexed:
+            return
+
+        index_name = f"idx_data_{self.llama_vector_store.table_name}_file_id"
+        try:
+            with self._get_sql_engine().begin() as conn:
+                exists = conn.execute(text("SELECT to_regclass(:table)"), {"table": self._data_table}).scalar()
+                if exists is None:
+                    return
+                conn.execute(text(
+                    f'CREATE INDEX IF NOT EXISTS "{index_name}" ON {self._data_table} ((metadata_->>\'file_id\'))'
+                ))
+            self._file_id_indexed = True
+        except Exception as e:
+            print(f"创建file_id索引失败: {e}")
+
+    def add_data(
+            self,
+            nodes: List[BaseNode],
+            **kwargs
+    ) -> None:
+        """
+        添加数据到向量存储，数据表已存在时通过COPY批量写入，首次写入由llama-index建表后补建file_id索引
+        
+        Args:
+            nodes: llama-index的Node对象列表
+        """
+        if not nodes:
+            return
+        if not self._copy_ready:
+            self._copy_ready = self._check_copy_table()
+        if not self._copy_ready:
+            super().add_data(nodes, **kwargs)
+            self._ensure_file_id_index()
+            return
+
+        embeddings = embed_nodes(nodes, self.embed_model, show_progress=False)
+        self._copy_nodes(nodes, embeddings)
+
+    def _check_copy_table(self) -> bool:
+        """
+        检查数据表是否已创建，并校验列布局是否与COPY写入的列一致
+        llama-index升级后表结构变化时直接报错，避免写入llama-index无法读取的数据
+        
+        Returns:
+            数据表存在时返回True，尚未创建时返回False
+        """
+        schema_name = self.llama_vector_store.schema_name
+        table_name = f"data_{self.llama_vector_store.table_name}"
+        with self._get_sql_engine().connect() as conn:
+            if conn.execute(text("SELECT to_regclass(:table)"), {"table": self._data_table}).scalar() is None:
+                return False
+            rows = conn.execute(text("""
+                SELECT column_name, is_nullable, column_default, is_generated
+                FROM information_schema.columns
+                WHERE table_schema = :schema AND table_name = :table
+            """), {"schema": schema_name, "table": table_name}).mappings().all()
+
+        columns = {row["column_name"]: row for row in rows}
+        missing = [column for column in COPY_COLUMNS if column not in columns]
+        # COPY未提供的列必须可为空、有默认值或由数据库生成
+        unfilled = [
+            name for name, row in columns.items()
+            if name not in COPY_COLUMNS and row["is_nullable"] == "NO"
+            and row["column_default"] is None and row["is_generated"] != "ALWAYS"
+        ]
+        if missing or unfilled:
+            raise RuntimeError(
+                f"数据表{self._data_table}的列布局与COPY写入不一致，缺少列: {missing}，未填充的必填列: {unfilled}"
+            )
+        return True
+
+    def _copy_nodes(self, nodes: List[BaseNode], embeddings: Dict[str, List[float]]) -> None:
+        """
+        使用COPY将节点一次性写入数据表，行格式与llama-index的写入保持一致，全文检索列由数据库生成
+        
+        Args:
+            nodes: 待写入的节点列表
+            embeddings: 节点ID到向量的映射
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        for node in nodes:
+            writer.writerow((
+                node.node_id,
+                node.get_content(metadata_mode=MetadataMode.NONE),
+                orjson.dumps(node_to_metadata_dict(node, remove_text=True, flat_metadata=False)).decode(),
+                orjson.dumps(embeddings[node.node_id]).decode(),
+            ))
+        buffer.seek(0)
+
+        conn = self._get_sql_engine().raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {self._data_table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _build_metadata_where(filters: Optional[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        将字典类型的过滤条件转换为metadata_列上的SQL条件，语义与_convert_filter_dict_to_metadata_filters一致
+        
+        Args:
+            filters: 字典类型的过滤条件
+            
+        Returns:
+            (WHERE子句, 绑定参数)
+        """
+        clauses = ["metadata_->>'file_id' IS NOT NULL"]
+        params = {}
+
+        for i, (key, value) in enumerate((filters or {}).items()):
+            params[f"k{i}"] = key
+            if isinstance(value, list):
+                clauses.append(f"metadata_->>:k{i} = ANY(:v{i})")
+                params[f"v{i}"] = [v if isinstance(v, str) else json.dumps(v) for v in value]
+            elif is_contains_pattern(value):
+                clauses.append(f"metadata_->>:k{i} LIKE :v{i}")
+                params[f"v{i}"] = value
+            elif value is None:
+                clauses.append(f"metadata_->>:k{i} IS NULL")
+            else:
+                clauses.append(f"metadata_->>:k{i} = :v{i}")
+                params[f"v{i}"] = value if isinstance(value, str) else json.dumps(value)
+
+        return " AND ".join(clauses), params
+
+    def list_files(
+            self,
+            offset: int = 0,
+            limit: int = 20,
+            filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        按file_id分组分页查询文件列表，分组和分页在数据库中完成
+        
+        Args:
+            offset: 跳过的文件数量
+            limit: 返回的文件数量
+            filters: 过滤条件，格式同get_data
+            
+        Returns:
+            (当前页的文件信息列表, 文件总数)
+        """
+        if not self.initialized or not self.vector_store_index:
+            raise ValueError("向量存储未初始化")
+
+        where, params = self._build_metadata_where(filters)
+        table = self._data_table
+
+        page_sql = text(f"""
+            SELECT metadata_->>'file_id' AS file_id,
+                   MIN(metadata_->>'file_name') AS file_name,
+                   MIN(metadata_->>'file_path') AS file_path,
+                   MAX(metadata_->>'upload_time') AS upload_time,
+                   MIN(metadata_->>'split_strategy') AS split_strategy,
+                   MIN(metadata_->>'chunk_size') AS chunk_size,
+                   MIN(metadata_->>'chunk_overlap') AS chunk_overlap,
+                   COUNT(*) AS node_count,
+                   COUNT(*) OVER () AS total
+            FROM {table}
+            WHERE {where}
+            GROUP BY metadata_->>'file_id'
+            ORDER BY upload_time DESC, file_id
+            LIMIT :limit OFFSET :offset
+        """)
+        count_sql = text(f"SELECT COUNT(DISTINCT metadata_->>'file_id') FROM {table} WHERE {where}")
+
+        with self._get_sql_engine().connect() as conn:
+            rows = conn.execute(page_sql, {**params, "limit": limit, "offset": offset}).mappings().all()
+            # 偏移超出范围时当前页为空，需要单独统计总数
+            total = rows[0]["total"] if rows else conn.execute(count_sql, params).scalar()
+
+        files = [{
+            "file_id": row["file_id"],
+            "file_name": row["file_name"] or 'unknown',
+            "file_path": row["file_path"] or '',
+            "upload_time": row["upload_time"] or '',
+            "split_strategy": row["split_strategy"] or '',
+            "chunk_size": int(row["chunk_size"] or 0),
+            "chunk_overlap": int(row["chunk_overlap"] or 0),
+            "node_count": row["node_count"]
+        } for row in rows]
+        return files, total or 0
+
     def search_by_text(
             self,
             text: str,
@@ -114,6 +402,25 @@ class PGVectorStore(BaseVectorStore):
         if not self.initialized or not self.vector_store_index:
             raise ValueError("向量存储未初始化")
 
+        retriever = self._get_hybrid_retriever(top_k, filters)
+        return retriever.retrieve(self._build_query_bundle(text, VectorStoreQueryMode.HYBRID))
+
+    def _get_hybrid_retriever(self, top_k: int, filters: Optional[Dict[str, Any]]) -> _ParallelFusionRetriever:
+        """
+        获取混合检索使用的融合检索器，相同top_k和过滤条件复用已构建的实例
+
+        Args:
+            top_k: 返回结果数量
+            filters: 过滤条件
+
+        Returns:
+            融合向量检索和稀疏检索的QueryFusionRetriever
+        """
+        cache_key = (top_k, repr(sorted(filters.items())) if filters else None)
+        retriever = self._hybrid_retrievers.get(cache_key)
+        if retriever is not None:
+            return retriever
+
         # 构建查询参数
         if filters:
             # 将字典转换为MetadataFilters
@@ -133,7 +440,7 @@ class PGVectorStore(BaseVectorStore):
             filters=metadata_filters,
         )
 
-        retriever = QueryFusionRetriever(
+        retriever = _ParallelFusionRetriever(
             [vector_retriever, text_retriever],
             similarity_top_k=5,
             num_queries=1,
@@ -141,5 +448,5 @@ class PGVectorStore(BaseVectorStore):
             use_async=False,
             llm=self.llm
         )
-
-        return retriever.retrieve(text)
+        self._hybrid_retrievers.set(cache_key, retriever)
+        return retriever
@@ -3,6 +3,7 @@ from app.model.embedding_model import (
     LocalEmbeddingModel,
     AliyunEmbeddingModel,
     get_embedding_model,
+    get_cached_query_embedding,
 )
 
 from app.model.rerank_model import (
@@ -24,6 +25,7 @@ __all__ = [
     "LocalEmbeddingModel", 
     "AliyunEmbeddingModel",
     "get_embedding_model",
+    "get_cached_query_embedding",
     
     # 重排模型
     "BaseRerankModel",
@@ -1,3 +1,5 @@
+import logging
+from functools import lru_cache
 from typing import List, Dict, Optional
 
 from llama_index.core import Settings
@@ -11,6 +13,23 @@ from app.config.config import (
     ALIYUN_CHAT_MODEL_CONFIG
 )
 
+logger = logging.getLogger(__name__)
+
+# 对话消息角色映射，未知角色按USER处理
+_ROLE_MAP = {
+    "user": MessageRole.USER,
+    "assistant": MessageRole.ASSISTANT,
+    "system": MessageRole.SYSTEM,
+}
+
+
+def _to_message_role(role: str) -> MessageRole:
+    message_role = _ROLE_MAP.get(role)
+    if message_role is None:
+        logger.warning("未知的角色类型 %s，使用USER角色替代", role)
+        return MessageRole.USER
+    return message_role
+
 
 class BaseChatModel:
     """
@@ -32,23 +51,7 @@ class BaseChatModel:
 
     @staticmethod
     def _convert_to_chat_messages(msg_list: List[Dict[str, str]]) -> List[ChatMessage]:
-        chat_messages = []
-        for msg in msg_list:
-            role = msg["role"]
-            content = msg["content"]
-
-            if role == "user":
-                role = MessageRole.USER
-            elif role == "assistant":
-                role = MessageRole.ASSISTANT
-            elif role == "system":
-                role = MessageRole.SYSTEM
-            else:
-                print(f"警告: 未知的角色类型 {role}，使用USER角色替代")
-                role = MessageRole.USER
-
-            chat_messages.append(ChatMessage(role=role, content=content))
-        return chat_messages
+        return [ChatMessage(role=_to_message_role(msg["role"]), content=msg["content"]) for msg in msg_list]
 
     def chat(self, chat_input: List[Dict[str, str]], **kwargs) -> str:
         if self._llm is None:
@@ -91,7 +94,7 @@ class LocalChatModel(BaseChatModel):
 
         super().__init__(model_name=model_name)
 
-        print(f"初始化本地LLM模型，模型: {model_name}, 温度: {temperature}, 最大生成Token: {max_tokens}")
+        logger.info("初始化本地LLM模型，模型: %s, 温度: %s, 最大生成Token: %s", model_name, temperature, max_tokens)
 
         generate_kwargs = {"temperature": temperature, "do_sample": True}
 
@@ -129,7 +132,7 @@ class AliyunChatModel(BaseChatModel):
         if not api_key:
             raise ValueError("阿里云API密钥未设置，请检查配置")
 
-        print(f"初始化阿里云LLM模型，模型: {model_name}, API密钥前缀: {api_key[:8]}...")
+        logger.info("初始化阿里云LLM模型，模型: %s, API密钥前缀: %s...", model_name, api_key[:8])
 
         self._llm = DashScope(
             model_name=model_name,
@@ -150,14 +153,21 @@ class ChatModelFactory:
         model_type = CHAT_MODEL_TYPE
 
         if model_type == "aliyun":
-            print("使用阿里云聊天模型...")
+            logger.info("使用阿里云聊天模型...")
             return AliyunChatModel()
         elif model_type == "local":
-            print("使用本地聊天模型...")
+            logger.info("使用本地聊天模型...")
             return LocalChatModel()
         else:
             raise ValueError(f"不支持的聊天模型类型: {model_type}")
 
 
+@lru_cache(maxsize=None)
 def get_chat_model() -> BaseChatModel:
+    """
+    获取聊天模型实例，进程内只创建一次，避免每次查询优化都重新创建模型
+    
+    Returns:
+        聊天模型实例
+    """
     return ChatModelFactory.create()
\ No newline at end of file
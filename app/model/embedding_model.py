@@ -1,5 +1,11 @@
-from typing import List, Optional, Any
+import asyncio
+import hashlib
+import logging
+from array import array
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Optional, Any
 
+import numpy as np
 from llama_index.core import Settings
 from llama_index.core.embeddings import BaseEmbedding
 from llama_index.embeddings.dashscope import DashScopeEmbedding
@@ -8,26 +14,134 @@ from pydantic import Field
 
 from app.config.config import (
     EMBED_MODEL_TYPE,
+    EMBED_CACHE_SIZE,
     LOCAL_EMBED_MODEL_CONFIG,
     ALIYUN_EMBED_MODEL_CONFIG
 )
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 查询向量缓存，键为(模型名称, 查询文本摘要)，向量以array紧凑存放
+_query_embedding_cache = TTLCache(maxsize=EMBED_CACHE_SIZE, ttl=3600.0)
+
+# 批量文本向量化时每个请求包含的文本数，DashScope单次请求最多25条
+LOCAL_EMBED_BATCH_SIZE = 64
+ALIYUN_EMBED_BATCH_SIZE = 25
+
+
+def _normalize(embedding: List[float]) -> List[float]:
+    """将向量归一化为单位长度，检索时内积即等于余弦相似度"""
+    vector = np.asarray(embedding, dtype=np.float32)
+    vector /= np.linalg.norm(vector) + 1e-12
+    return vector.tolist()
+
+
+def _normalize_batch(embeddings: List[List[float]]) -> List[List[float]]:
+    """批量归一化向量，一次矩阵运算完成"""
+    if not embeddings:
+        return []
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    return vectors.tolist()
+
+
+def _query_cache_key(model_name: str, query: str) -> tuple:
+    """查询向量缓存键，查询文本以16字节摘要表示"""
+    return model_name, hashlib.blake2b(query.encode(), digest_size=16).digest()
+
+
+def _cached_query_embedding(model_name: str, query: str, compute: Callable[[str], List[float]]) -> List[float]:
+    """
+    从缓存获取查询向量，未命中时调用compute计算并写入缓存
+    
+    Args:
+        model_name: 模型名称
+        query: 查询文本
+        compute: 实际计算查询向量的函数
+        
+    Returns:
+        查询向量
+    """
+    key = _query_cache_key(model_name, query)
+    embedding = _query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = array('d', _normalize(compute(query)))
+        _query_embedding_cache.set(key, embedding)
+    return embedding.tolist()
+
+
+async def _acached_query_embedding(model_name: str, query: str,
+                                   acompute: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+    """
+    异步版本的_cached_query_embedding，未命中时等待acompute，期间不阻塞事件循环
+    
+    Args:
+        model_name: 模型名称
+        query: 查询文本
+        acompute: 实际计算查询向量的异步函数
+        
+    Returns:
+        查询向量
+    """
+    key = _query_cache_key(model_name, query)
+    embedding = _query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = array('d', _normalize(await acompute(query)))
+        _query_embedding_cache.set(key, embedding)
+    return embedding.tolist()
+
+
+def _create_hf_embedding(model_name: str) -> BaseEmbedding:
+    """
+    在进程内加载HuggingFace嵌入模型，有GPU时使用半精度权重
+
+    Args:
+        model_name: HuggingFace模型名称或本地路径
+
+    Returns:
+        HuggingFaceEmbedding实例
+    """
+    import torch
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    use_cuda = torch.cuda.is_available()
+    return HuggingFaceEmbedding(
+        model_name=model_name,
+        embed_batch_size=LOCAL_EMBED_BATCH_SIZE,
+        device="cuda" if use_cuda else "cpu",
+        # CPU上的半精度矩阵运算反而更慢，只在GPU上启用
+        model_kwargs={"torch_dtype": torch.float16} if use_cuda else {}
+    )
 
 
 class LocalEmbeddingModel(BaseEmbedding):
     """
-    本地嵌入模型封装类，使用HuggingFace模型
+    本地嵌入模型封装类，支持Ollama服务和进程内HuggingFace模型两种运行方式
+    输出的向量均已归一化为单位长度
     """
 
-    def __init__(self, model_name: Optional[str] = None):
+    def __init__(self, model_name: Optional[str] = None, backend: Optional[str] = None):
         """
         初始化嵌入模型
         
         Args:
             model_name: 模型名称，默认使用配置文件中指定的模型
+            backend: 运行方式，ollama或hf，默认使用配置文件中指定的方式
         """
         model_name = model_name or LOCAL_EMBED_MODEL_CONFIG["model_name"]
-        super().__init__(model_name=model_name)
-        self._local_model = OllamaEmbedding(base_url="http://127.0.0.1:11434", model_name=model_name)
+        backend = backend or LOCAL_EMBED_MODEL_CONFIG["backend"]
+        super().__init__(model_name=model_name, embed_batch_size=LOCAL_EMBED_BATCH_SIZE)
+
+        if backend == "hf":
+            self._local_model = _create_hf_embedding(model_name)
+        elif backend == "ollama":
+            self._local_model = OllamaEmbedding(base_url="http://127.0.0.1:11434", model_name=model_name,
+                                                embed_batch_size=LOCAL_EMBED_BATCH_SIZE)
+        else:
+            raise ValueError(f"不支持的本地嵌入模型运行方式: {backend}")
+        # 进程内模型的异步接口实际是同步计算，需要放到线程中执行
+        self._in_process = backend == "hf"
 
     def _get_text_embedding(self, text: str) -> List[float]:
         """
@@ -39,7 +153,7 @@ class LocalEmbeddingModel(BaseEmbedding):
         Returns:
             文本的向量表示
         """
-        return self._local_model.get_text_embedding(text)
+        return _normalize(self._local_model.get_text_embedding(text))
 
     def _get_query_embedding(self, query: str) -> List[float]:
         """
@@ -51,7 +165,7 @@ class LocalEmbeddingModel(BaseEmbedding):
         Returns:
             查询文本的向量表示
         """
-        return self._local_model.get_query_embedding(query)
+        return _cached_query_embedding(self.model_name, query, self._local_model.get_query_embedding)
 
     async def _aget_query_embedding(self, query: str) -> List[float]:
         """
@@ -63,8 +177,51 @@ class LocalEmbeddingModel(BaseEmbedding):
         Returns:
             查询文本的向量表示
         """
-        # 默认实现，调用同步方法
-        return self._get_query_embedding(query)
+        if self._in_process:
+            return await _acached_query_embedding(
+                self.model_name, query, lambda q: asyncio.to_thread(self._local_model.get_query_embedding, q)
+            )
+        return await _acached_query_embedding(self.model_name, query, self._local_model.aget_query_embedding)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        """
+        异步获取文本的向量表示
+        
+        Args:
+            text: 输入文本
+            
+        Returns:
+            文本的向量表示
+        """
+        if self._in_process:
+            return await asyncio.to_thread(self._get_text_embedding, text)
+        return _normalize(await self._local_model.aget_text_embedding(text))
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        批量获取文本的向量表示，一个批次只发送一次请求
+        
+        Args:
+            texts: 输入文本列表
+            
+        Returns:
+            文本的向量表示列表
+        """
+        return _normalize_batch(self._local_model.get_text_embedding_batch(texts, show_progress=False))
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        异步批量获取文本的向量表示
+        
+        Args:
+            texts: 输入文本列表
+            
+        Returns:
+            文本的向量表示列表
+        """
+        if self._in_process:
+            return await asyncio.to_thread(self._get_text_embeddings, texts)
+        return _normalize_batch(await self._local_model.aget_text_embedding_batch(texts, show_progress=False))
 
     def set_as_default(self) -> 'LocalEmbeddingModel':
         """
@@ -77,6 +234,7 @@ class LocalEmbeddingModel(BaseEmbedding):
 class AliyunEmbeddingModel(BaseEmbedding):
     """
     阿里云百炼嵌入模型封装类，使用llama-index提供的集成
+    输出的向量均已归一化为单位长度
     """
 
     dashscope_model: Any = Field(default=None, exclude=True, description="DashScope嵌入模型实例")
@@ -91,15 +249,16 @@ class AliyunEmbeddingModel(BaseEmbedding):
         if not api_key:
             raise ValueError("阿里云API密钥未设置，请检查配置")
 
-        print(f"初始化阿里云嵌入模型，模型: {model_name}, API密钥前缀: {api_key[:8]}...")
+        logger.info("初始化阿里云嵌入模型，模型: %s, API密钥前缀: %s...", model_name, api_key[:8])
 
         # 先调用父类初始化
-        super().__init__(model_name=model_name)
+        super().__init__(model_name=model_name, embed_batch_size=ALIYUN_EMBED_BATCH_SIZE)
 
         # 初始化llama-index的DashScopeEmbedding
         self._dashscope_model = DashScopeEmbedding(
             model_name=model_name,
-            api_key=api_key
+            api_key=api_key,
+            embed_batch_size=ALIYUN_EMBED_BATCH_SIZE
         )
 
     def _get_text_embedding(self, text: str) -> List[float]:
@@ -112,7 +271,7 @@ class AliyunEmbeddingModel(BaseEmbedding):
         Returns:
             文本的向量表示
         """
-        return self._dashscope_model.get_text_embedding(text)
+        return _normalize(self._dashscope_model.get_text_embedding(text))
 
     def _get_query_embedding(self, query: str) -> List[float]:
         """
@@ -124,7 +283,7 @@ class AliyunEmbeddingModel(BaseEmbedding):
         Returns:
             查询文本的向量表示
         """
-        return self._dashscope_model.get_query_embedding(query)
+        return _cached_query_embedding(self.model_name, query, self._dashscope_model.get_query_embedding)
 
     async def _aget_query_embedding(self, query: str) -> List[float]:
         """
@@ -136,8 +295,46 @@ class AliyunEmbeddingModel(BaseEmbedding):
         Returns:
             查询文本的向量表示
         """
-        # 默认实现，调用同步方法
-        return self._get_query_embedding(query)
+        # DashScope客户端只有同步接口，放到线程中执行，避免阻塞事件循环
+        return await _acached_query_embedding(
+            self.model_name, query, lambda q: asyncio.to_thread(self._dashscope_model.get_query_embedding, q)
+        )
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        """
+        异步获取文本的向量表示
+        
+        Args:
+            text: 输入文本
+            
+        Returns:
+            文本的向量表示
+        """
+        return await asyncio.to_thread(self._get_text_embedding, text)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        批量获取文本的向量表示，一个批次只发送一次请求
+        
+        Args:
+            texts: 输入文本列表
+            
+        Returns:
+            文本的向量表示列表
+        """
+        return _normalize_batch(self._dashscope_model.get_text_embedding_batch(texts, show_progress=False))
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        异步批量获取文本的向量表示
+        
+        Args:
+            texts: 输入文本列表
+            
+        Returns:
+            文本的向量表示列表
+        """
+        return await asyncio.to_thread(self._get_text_embeddings, texts)
 
     @property
     def model(self):
@@ -167,20 +364,36 @@ class EmbeddingModelFactory:
         model_type = EMBED_MODEL_TYPE
 
         if model_type == "aliyun":
-            print("使用阿里云嵌入模型...")
+            logger.info("使用阿里云嵌入模型...")
             return AliyunEmbeddingModel()
         elif model_type == "local":
-            print("使用本地嵌入模型...")
+            logger.info("使用本地嵌入模型...")
             return LocalEmbeddingModel()
         else:
             raise ValueError(f"不支持的嵌入模型类型: {model_type}")
 
 
+@lru_cache(maxsize=None)
 def get_embedding_model() -> BaseEmbedding:
     """
-    获取嵌入模型实例
+    获取嵌入模型实例，进程内只创建一次，模型权重不会重复加载
     
     Returns:
         嵌入模型实例
     """
-    return EmbeddingModelFactory.create()
\ No newline at end of file
+    return EmbeddingModelFactory.create()
+
+
+def get_cached_query_embedding(text: str, embed_model: Optional[BaseEmbedding] = None) -> List[float]:
+    """
+    获取查询向量，项目内的嵌入模型在_get_query_embedding中已按模型和查询文本缓存，这里直接调用
+    
+    Args:
+        text: 查询文本
+        embed_model: 嵌入模型，默认使用get_embedding_model()
+        
+    Returns:
+        查询向量
+    """
+    embed_model = embed_model or get_embedding_model()
+    return embed_model.get_query_embedding(text)
@@ -1,3 +1,5 @@
+import logging
+from functools import lru_cache
 from typing import List, Optional
 
 from llama_index.core import Settings
@@ -12,6 +14,8 @@ from app.config.config import (
     ALIYUN_RERANK_MODEL_CONFIG
 )
 
+logger = logging.getLogger(__name__)
+
 
 class BaseRerankModel(BaseNodePostprocessor):
     """
@@ -77,7 +81,7 @@ class LocalRerankModel(BaseRerankModel):
         # 调用父类初始化
         super().__init__(model_name=model_name)
         
-        print(f"初始化本地BGE重排模型，模型: {model_name}, top_n: {top_n}")
+        logger.info("初始化本地BGE重排模型，模型: %s, top_n: %s", model_name, top_n)
         
         # 初始化BGE重排模型
         self._reranker = SentenceTransformerRerank(
@@ -140,7 +144,7 @@ class AliyunRerankModel(BaseRerankModel):
         if not api_key:
             raise ValueError("阿里云API密钥未设置，请检查配置")
         
-        print(f"初始化阿里云重排模型，模型: {model_name}, API密钥前缀: {api_key[:8]}...")
+        logger.info("初始化阿里云重排模型，模型: %s, API密钥前缀: %s...", model_name, api_key[:8])
 
         # 目前阿里云百炼平台通过DashScopeRerank集成GTE-Rerank模型
         self._reranker = DashScopeRerank(
@@ -188,18 +192,19 @@ class RerankModelFactory:
         model_type = RERANK_MODEL_TYPE
         
         if model_type == "aliyun":
-            print("使用阿里云重排模型...")
+            logger.info("使用阿里云重排模型...")
             return AliyunRerankModel()
         elif model_type == "local":
-            print("使用本地重排模型...")
+            logger.info("使用本地重排模型...")
             return LocalRerankModel()
         else:
             raise ValueError(f"不支持的重排模型类型: {model_type}")
 
 
+@lru_cache(maxsize=None)
 def get_rerank_model() -> BaseRerankModel:
     """
-    获取重排模型实例
+    获取重排模型实例，进程内只创建一次，模型权重不会重复加载
     
     Returns:
         重排模型实例
@@ -1,42 +1,62 @@
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+# 有效的检索模式
+VALID_MODES = frozenset({"vector", "text", "hybrid", "sparse", "semantic_hybrid"})
+
+# 可能携带检索模式的参数名称，按优先级排列
+MODE_PARAM_NAMES = ("mode", "search_mode", "query_mode")
+
+
+@lru_cache(maxsize=64)
+def _resolve_mode(candidates: Tuple[Optional[str], ...], default_mode: str) -> str:
+    """
+    按优先级返回第一个有效的检索模式，结果按参数取值缓存
+
+    Args:
+        candidates: 各参数名称对应的取值，未提供时为None
+        default_mode: 未找到有效模式时使用的默认模式
+
+    Returns:
+        检索模式
+    """
+    for candidate in candidates:
+        if candidate is not None:
+            user_mode = candidate.lower()
+            if user_mode in VALID_MODES:
+                return user_mode
+    return default_mode
+
 
 class QueryRouter:
     """
     查询路由器，根据配置和用户参数确定使用哪种检索模式
     """
-    
+
     def __init__(self, search_mode: str):
         """
         初始化路由器
-        
+
         Args:
             search_mode: 检索方式
         """
-        # 从配置中获取默认检索模式，默认为vector
-        self.default_mode = search_mode
-        
+        # 从配置中获取默认检索模式，无效时使用vector
+        search_mode = (search_mode or "").lower()
+        self.default_mode = search_mode if search_mode in VALID_MODES else "vector"
+
     def determine_mode(self, params: Optional[Dict[str, Any]] = None) -> str:
         """
         确定适合的查询模式
-        
+
         Args:
             params: 用户提供的参数，可能包含所需的检索模式
-            
+
         Returns:
             检索模式：vector, text, hybrid, sparse, semantic_hybrid
         """
-        params = params or {}
-        
-        # 有效的检索模式列表
-        valid_modes = ["vector", "text", "hybrid", "sparse", "semantic_hybrid"]
-        
+        if not params:
+            return self.default_mode
+
         # 优先使用用户指定的模式
-        # 查找可能的模式参数名称
-        for param_name in ["mode", "search_mode", "query_mode"]:
-            if param_name in params:
-                user_mode = params[param_name].lower()
-                if user_mode in valid_modes:
-                    return user_mode
-        
-        # 如果未找到有效模式，返回默认模式
-        return self.default_mode 
\ No newline at end of file
+        candidates = tuple(params.get(param_name) for param_name in MODE_PARAM_NAMES)
+        return _resolve_mode(candidates, self.default_mode)
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional
+
+import numpy as np
+from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.schema import NodeWithScore
+
+
+class SemanticQueryCache:
+    """
+    语义查询缓存，按查询向量的余弦相似度命中语义相近的历史查询
+    查询向量归一化后存放在连续矩阵中，一次矩阵乘法即可完成全部相似度计算
+    """
+
+    def __init__(
+            self,
+            embed_model: BaseEmbedding,
+            threshold: float = 0.87,
+            max_items: int = 1024,
+            ttl: float = 300.0
+    ):
+        """
+        初始化语义缓存
+
+        Args:
+            embed_model: 用于计算查询向量的嵌入模型
+            threshold: 命中所需的最小余弦相似度
+            max_items: 最大缓存条目数，超出后淘汰最久未使用的条目
+            ttl: 条目有效期（秒），用于限制数据更新后的结果陈旧时间
+        """
+        self.embed_model = embed_model
+        self.threshold = threshold
+        self.max_items = max_items
+        self.ttl = ttl
+
+        self._vectors: Optional[np.ndarray] = None  # (max_items, dim)，首次写入时按向量维度分配
+        self._valid = np.zeros(max_items, dtype=bool)
+        self._entries: List[Optional[tuple]] = [None] * max_items  # 每个槽位的 (key, results, expires_at)
+        self._lru: OrderedDict[int, None] = OrderedDict()  # 已占用槽位，按最近使用排序
+        self._lock = threading.Lock()
+
+    def embed(self, query_text: str) -> np.ndarray:
+        """
+        计算归一化的查询向量
+
+        Args:
+            query_text: 查询文本
+
+        Returns:
+            L2归一化后的float32向量
+        """
+        vector = np.asarray(self.embed_model.get_query_embedding(query_text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, vector: np.ndarray, key: Hashable) -> Optional[List[NodeWithScore]]:
+        """
+        查找相似度超过阈值且查询参数一致的缓存结果
+
+        Args:
+            vector: 归一化的查询向量
+            key: 查询参数键，top_k、过滤条件、检索模式等必须完全一致
+
+        Returns:
+            缓存的结果列表，未命中时返回None
+        """
+        with self._lock:
+            if self._vectors is None or not self._lru:
+                return None
+
+            similarities = self._vectors @ vector
+            similarities[~self._valid] = -1.0
+            candidates = np.flatnonzero(similarities >= self.threshold)
+            if not candidates.size:
+                return None
+
+            now = time.monotonic()
+            for slot in candidates[np.argsort(-similarities[candidates])].tolist():
+                entry_key, results, expires_at = self._entries[slot]
+                if expires_at < now:
+                    self._release(slot)
+                    continue
+                if entry_key == key:
+                    self._lru.move_to_end(slot)
+                    return list(results)
+            return None
+
+    def put(self, vector: np.ndarray, key: Hashable, results: List[NodeWithScore]):
+        """
+        写入查询结果
+
+        Args:
+            vector: 归一化的查询向量
+            key: 查询参数键
+            results: 查询结果列表
+        """
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_items, vector.shape[0]), dtype=np.float32)
+
+            if len(self._lru) >= self.max_items:
+                self._release(next(iter(self._lru)))
+            slot = int(np.argmin(self._valid))
+
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._entries[slot] = (key, list(results), time.monotonic() + self.ttl)
+            self._lru[slot] = None
+
+    def clear(self):
+        """清空缓存，数据变更后调用"""
+        with self._lock:
+            self._valid[:] = False
+            self._entries = [None] * self.max_items
+            self._lru.clear()
+
+    def _release(self, slot: int):
+        self._valid[slot] = False
+        self._entries[slot] = None
+        self._lru.pop(slot, None)
+
+
+def make_query_cache_key(top_k: int, filters: Optional[dict], params: Optional[dict], *flags: Any) -> tuple:
+    """
+    生成查询参数键，字典参数按键排序后转为元组以便比较
+
+    Args:
+        top_k: 返回结果数量
+        filters: 过滤条件
+        params: 查询参数
+        *flags: 其他影响结果的开关
+
+    Returns:
+        可比较的参数元组
+    """
+    return (
+        top_k,
+        repr(sorted((filters or {}).items())),
+        repr(sorted((params or {}).items())),
+        flags
+    )
@@ -12,6 +12,10 @@ class PostProcessorChain:
     def __init__(self, processors: List[BaseNodePostprocessor]):
         self.processors = processors
 
+    def __len__(self) -> int:
+        # 没有处理器时链为假值，调用方可直接跳过
+        return len(self.processors)
+
     def postprocess_nodes(self, nodes: List[NodeWithScore], query: str) -> List[NodeWithScore]:
         for processor in self.processors:
             nodes = processor.postprocess_nodes(nodes, query_str=query)
@@ -7,6 +7,10 @@ class PreQueryProcessorChain:
     def __init__(self, processors: List[BasePreQueryProcessor]):
         self.processors = processors
 
+    def __len__(self) -> int:
+        # 没有处理器时链为假值，调用方可直接跳过
+        return len(self.processors)
+
     def run(self, query: str) -> str:
         for processor in self.processors:
             query = processor.run(query)
@@ -1,5 +1,8 @@
+import hashlib
+
 from app.model.chat_model import get_chat_model
 from app.query_processing.query_pre.base_processor import BasePreQueryProcessor
+from app.utils.ttl_cache import TTLCache
 
 
 class QuestionOptimizerProcessor(BasePreQueryProcessor):
@@ -7,13 +10,21 @@ class QuestionOptimizerProcessor(BasePreQueryProcessor):
         self.system_prompt = system_prompt or (
             "请将用户的问题改写为更完整、更具体、更适合知识库检索的问题，只返回改写后的问句，不要添加说明。"
         )
+        # 改写结果缓存，相同问题不重复调用大模型
+        self._cache = TTLCache(maxsize=4096, ttl=3600.0)
 
     def run(self, query: str) -> str:
+        cache_key = hashlib.blake2b(query.encode(), digest_size=16).digest()
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             chat_model = get_chat_model()
             prompt = f"{self.system_prompt}\n\n用户问题：{query}"
-            result = chat_model.generate(prompt)
-            return result.strip()
+            result = chat_model.generate(prompt).strip()
+            self._cache.set(cache_key, result)
+            return result
         except Exception as e:
             print(f"[QuestionOptimizer] 生成失败: {e}")
             return query
\ No newline at end of file
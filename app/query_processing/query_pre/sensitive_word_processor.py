@@ -1,9 +1,20 @@
+import re
+from functools import lru_cache
+
 from app.query_processing.query_pre.base_processor import BasePreQueryProcessor
 
+# 敏感词列表
+SENSITIVE_WORDS = ["非法词", "敏感词"]
+# 全部敏感词合并为一个正则，长词优先，一次扫描即可去除所有敏感词
+SENSITIVE_WORD_REGEX = re.compile("|".join(map(re.escape, sorted(SENSITIVE_WORDS, key=len, reverse=True))))
+
+
+@lru_cache(maxsize=10000)
+def _remove_sensitive_words(query: str) -> str:
+    """去除查询中的敏感词，相同查询只处理一次"""
+    return SENSITIVE_WORD_REGEX.sub("", query)
+
 
 class SensitiveWordProcessor(BasePreQueryProcessor):
     def run(self, query: str) -> str:
-        sensitive_words = ["非法词", "敏感词"]
-        for word in sensitive_words:
-            query = query.replace(word, "")
-        return query
+        return _remove_sensitive_words(query)
@@ -0,0 +1 @@
+# 通用工具模块
@@ -0,0 +1,29 @@
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows下没有fcntl，开发环境单进程运行，不加锁
+    fcntl = None
+
+
+@contextmanager
+def file_lock(lock_path: str) -> Iterator[None]:
+    """
+    进程间互斥锁，多个worker同时启动时保证同一时刻只有一个进程执行临界区
+
+    Args:
+        lock_path: 锁文件路径，不存在时自动创建
+    """
+    if fcntl is None:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
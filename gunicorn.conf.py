@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Gunicorn生产部署配置
+运行示例：gunicorn -c gunicorn.conf.py "main:create_app()"
+"""
+
+import os
+
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', 5001)}"
+
+# 每个worker内部自带文档处理进程池，worker数量不宜过多；
+# 上传与入库主要是网络和磁盘等待，使用线程worker让同一进程内的请求互相重叠
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+
+# 大文件上传和目录导入耗时较长
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 600))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
@@ -6,8 +6,10 @@ Flask应用程序主入口
 """
 
 from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import logging
+import orjson
 import os
 
 from app.api.query import init_query_routes
@@ -21,6 +23,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    基于orjson的JSON序列化，加速检索结果等大响应的生成
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def create_app():
     """
     创建Flask应用实例
@@ -29,6 +43,7 @@ def create_app():
         Flask应用实例
     """
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
     # 启用CORS支持
     CORS(app)
@@ -36,6 +51,8 @@ def create_app():
     # 配置应用
     app.config['JSON_AS_ASCII'] = False  # 支持中文JSON响应
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 0)) or None  # 上传请求体大小上限（字节），0表示不限制
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = int(os.getenv('SEND_FILE_MAX_AGE', 3600))  # 文件下载缓存时间（秒）
     
     # 注册查询API路由
     try:
@@ -48,6 +65,8 @@ def create_app():
     # 注册数据API路由
     try:
         data_api = init_data_routes(app)
+        # 数据变更后清空查询结果缓存
+        data_api.add_data_change_listener(query_api.clear_result_caches)
         logger.info("数据API路由注册成功")
     except Exception as e:
         logger.error(f"数据API路由注册失败: {str(e)}")
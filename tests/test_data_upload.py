@@ -0,0 +1,86 @@
+import pytest
+
+data_api = pytest.importorskip("app.api.data")
+
+
+class _DuplicateStore:
+    """按文件汇总信息返回一个已入库文件的向量库替身，记录查询使用的过滤条件"""
+
+    def __init__(self, file_path: str, metadata_digest: str = None):
+        self.file_path = file_path
+        self.metadata_digest = metadata_digest
+        self.filters = None
+
+    def list_files(self, offset=0, limit=20, filters=None):
+        self.filters = filters
+        if self.metadata_digest is not None and filters["metadata_digest"] != self.metadata_digest:
+            return [], 0
+        return [{
+            "file_id": "existing",
+            "file_name": "report.txt",
+            "file_path": self.file_path,
+            "node_count": 3,
+        }], 1
+
+    def add_data(self, nodes):
+        pass
+
+
+def _upload_with_custom_name(api, tmp_path, content: bytes) -> str:
+    """模拟_handle_upload中保存上传文件并按自定义文件名重命名的过程"""
+    uploaded = tmp_path / "upload.tmp"
+    uploaded.write_bytes(content)
+    final_path = data_api._reserve_unique_path(api.upload_dir / "report.txt")
+    data_api.os.replace(uploaded, final_path)
+    return str(final_path)
+
+
+def test_same_content_and_custom_filename_twice_keeps_indexed_file(tmp_path):
+    api = data_api.DataAPI()
+    api.upload_dir = tmp_path
+
+    first_path = _upload_with_custom_name(api, tmp_path, b"same content")
+    api.vector_store = _DuplicateStore(first_path)
+
+    second_path = _upload_with_custom_name(api, tmp_path, b"same content")
+    assert second_path != first_path
+
+    result = api._process_document(second_path, "new", "report.txt", content_hash="hash",
+                                   custom_filename="report")
+
+    assert api.vector_store.filters["custom_filename"] == "report"
+    assert result["duplicate"] is True
+    assert result["file_path"] == first_path
+    assert (tmp_path / "report.txt").read_bytes() == b"same content"
+    assert not (tmp_path / "report_1.txt").exists()
+
+
+def test_duplicate_with_identical_path_is_not_deleted(tmp_path):
+    api = data_api.DataAPI()
+    api.upload_dir = tmp_path
+    existing = tmp_path / "report.txt"
+    existing.write_bytes(b"same content")
+    api.vector_store = _DuplicateStore(str(existing))
+
+    api._process_document(str(existing), "new", "report.txt", content_hash="hash")
+
+    assert existing.exists()
+
+
+def test_same_content_with_different_metadata_is_not_deduplicated(tmp_path, monkeypatch):
+    api = data_api.DataAPI()
+    api.upload_dir = tmp_path
+    existing = tmp_path / "report.txt"
+    existing.write_bytes(b"same content")
+    api.vector_store = _DuplicateStore(str(existing), data_api._metadata_digest({"tag": "a"}))
+
+    prepared = []
+    monkeypatch.setattr(api, "_prepare_nodes", lambda *args: prepared.append(args) or ({"file_name": "report.txt"}, []))
+    monkeypatch.setattr(api, "_record_ingested", lambda results: None)
+
+    upload = tmp_path / "report_1.txt"
+    upload.write_bytes(b"same content")
+    result = api._process_document(str(upload), "new", "report.txt", metadata={"tag": "b"}, content_hash="hash")
+
+    assert "duplicate" not in result
+    assert prepared and prepared[0][6]["tag"] == "b"
@@ -0,0 +1,14 @@
+import pytest
+
+factory = pytest.importorskip("app.data_indexing.file.document_splitter.document_splitter_factory")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("什么？！他说。", ["什么？", "！他说。"]),
+    ("真的吗？？我不信。", ["真的吗？", "？我不信。"]),
+    ("好。。。是的", ["好。", "。。", "是的"]),
+    ("他说：“好。”然后走了。", ["他说：“好。”", "然后走了。"]),
+    ("等等......再说", ["等等......", "再说"]),
+])
+def test_chinese_sentence_splitter_keeps_original_grouping(text, expected):
+    assert factory._chinese_sentence_splitter(text) == expected